@@ -0,0 +1,191 @@
+import market_data
+
+# GUI-free analysis shared by the app, the batch snapshot mode and the
+# screener. Nothing here may import PyQt5.
+
+FUNDAMENTAL_FIELDS = [
+    "marketCap",
+    "trailingPE",
+    "trailingEps",
+    "forwardPE",
+    "dividendYield",
+    "fiftyTwoWeekHigh",
+    "fiftyTwoWeekLow",
+]
+PRICE_TARGET_FIELDS = ["current", "low", "high", "mean", "median"]
+
+DEFAULT_COMPETITORS = ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NVDA", "JPM", "JNJ", "V"]
+
+# This is a simplified example. You might want to expand this with more sectors and stocks.
+SECTOR_COMPETITORS = {
+    "Technology": {
+        "Software": ["MSFT", "ORCL", "CRM", "ADBE", "INTU", "NOW", "WDAY", "TEAM", "ZS", "PANW"],
+        "Hardware": ["AAPL", "DELL", "HPQ", "LEN", "NTAP", "WDC", "STX", "LOGI", "JNPR", "CSCO"],
+        "Semiconductors": ["NVDA", "INTC", "AMD", "TSM", "AVGO", "QCOM", "TXN", "AMAT", "LRCX", "MU"],
+    },
+    "Communication Services": {
+        "Internet Content & Information": ["GOOGL", "META", "RDDT", "SNAP", "PINS", "MTCH", "SPOT", "ZM", "NFLX", "DIS"],
+    },
+    "Consumer Cyclical": {
+        "Internet Retail": ["AMZN", "BABA", "JD", "EBAY", "ETSY", "W", "CHWY", "CVNA", "MELI", "BYON"],
+    },
+    "Financial Services": {
+        "Banks": ["JPM", "BAC", "WFC", "C", "GS", "MS", "USB", "PNC", "TFC", "FITB"],
+    },
+    "Healthcare": {
+        "Drug Manufacturers": ["JNJ", "PFE", "MRK", "ABBV", "LLY", "BMY", "AMGN", "GILD", "BIIB", "VRTX"],
+    },
+}
+
+
+def get_sector_competitors(sector, industry):
+    if sector in SECTOR_COMPETITORS and industry in SECTOR_COMPETITORS[sector]:
+        return SECTOR_COMPETITORS[sector][industry]
+    elif sector in SECTOR_COMPETITORS:
+        return [stock for industry_list in SECTOR_COMPETITORS[sector].values() for stock in industry_list]
+    else:
+        return DEFAULT_COMPETITORS
+
+
+def sector_universe():
+    # Every symbol named in the sector table, in order, without duplicates
+    symbols = [stock for industries in SECTOR_COMPETITORS.values() for stocks in industries.values() for stock in stocks]
+    return list(dict.fromkeys(symbols + DEFAULT_COMPETITORS))
+
+
+TREND_TEXT = {
+    "strong_uptrend": "Strong uptrend. All shorter-term MAs above longer-term MAs.",
+    "strong_downtrend": "Strong downtrend. All shorter-term MAs below longer-term MAs.",
+    "bullish": "Potential bullish trend. Shorter-term MAs rising faster than longer-term MAs.",
+    "bearish": "Potential bearish trend. Shorter-term MAs falling faster than longer-term MAs.",
+    "mixed": "Mixed signals. No clear trend direction.",
+}
+OSCILLATOR_TEXT = {
+    "overbought": "Overbought condition",
+    "oversold": "Oversold condition",
+    "neutral": "Neutral",
+}
+
+
+# Oscillator levels behind the verdicts; the backtest replays these
+STOCH_OVERBOUGHT = 80
+STOCH_OVERSOLD = 20
+RSI_OVERBOUGHT = 70
+RSI_OVERSOLD = 30
+
+
+def trend_signal(ma10, ma30, ma50):
+    if ma10 > ma30 and ma30 > ma50:
+        return "strong_uptrend"
+    elif ma10 < ma30 and ma30 < ma50:
+        return "strong_downtrend"
+    elif ma10 > ma30 > ma50:
+        return "bullish"
+    elif ma10 < ma30 < ma50:
+        return "bearish"
+    return "mixed"
+
+
+def stochastic_signal(k, d):
+    if k > STOCH_OVERBOUGHT and d > STOCH_OVERBOUGHT:
+        return "overbought"
+    elif k < STOCH_OVERSOLD and d < STOCH_OVERSOLD:
+        return "oversold"
+    return "neutral"
+
+
+def rsi_signal(rsi):
+    if rsi > RSI_OVERBOUGHT:
+        return "overbought"
+    elif rsi < RSI_OVERSOLD:
+        return "oversold"
+    return "neutral"
+
+
+def compute_snapshot(symbol, live=None):
+    # Everything the analysis panel shows, as plain data; `live` is the
+    # latest streamed quote, if any (see market_data.get_indicators)
+    indicators = market_data.get_indicators(symbol, live=live)
+    info = market_data.get_info(symbol)
+    try:
+        price_targets = market_data.get_price_targets(symbol)
+        price_targets = {field: float(price_targets[field]) for field in PRICE_TARGET_FIELDS}
+    except Exception:
+        price_targets = None
+
+    return {
+        "symbol": symbol,
+        "fundamentals": {field: info.get(field, "N/A") for field in FUNDAMENTAL_FIELDS},
+        "indicators": indicators,
+        "signals": {
+            "trend": trend_signal(indicators["ma10"], indicators["ma30"], indicators["ma50"]),
+            "stochastic": stochastic_signal(indicators["k"], indicators["d"]),
+            "rsi": rsi_signal(indicators["rsi"]),
+        },
+        "price_targets": price_targets,
+    }
+
+
+def format_value(value, decimal_places=2):
+    if isinstance(value, (int, float)):
+        return f"{value:.{decimal_places}f}"
+    return str(value)
+
+
+def format_analysis(snapshot):
+    fundamentals = snapshot["fundamentals"]
+    indicators = snapshot["indicators"]
+    signals = snapshot["signals"]
+
+    # Prepare analysis text
+    analysis = f"Analysis for {snapshot['symbol']}:\n\n"
+
+    # Add fundamental data
+    analysis += "Fundamental Data:\n"
+    analysis += f"Market Cap: ${fundamentals['marketCap']:,}\n"
+    analysis += f"P/E Ratio: {format_value(fundamentals['trailingPE'])}\n"
+    analysis += f"EPS (TTM): ${format_value(fundamentals['trailingEps'])}\n"
+    analysis += f"Forward P/E: {format_value(fundamentals['forwardPE'])}\n"
+
+    # Handle dividend yield formatting
+    dividend_yield = fundamentals['dividendYield']
+    if isinstance(dividend_yield, (int, float)):
+        analysis += f"Dividend Yield: {dividend_yield:.2%}\n"
+    else:
+        analysis += f"Dividend Yield: {dividend_yield}\n"
+
+    analysis += f"52 Week High: ${format_value(fundamentals['fiftyTwoWeekHigh'])}\n"
+    analysis += f"52 Week Low: ${format_value(fundamentals['fiftyTwoWeekLow'])}\n"
+
+    analysis += "\n"
+
+    # Add existing technical analysis
+    analysis += f"Moving Averages:\n"
+    analysis += f"10 Day: {indicators['ma10']:.2f}\n"
+    analysis += f"30 Day: {indicators['ma30']:.2f}\n"
+    analysis += f"50 Day: {indicators['ma50']:.2f}\n"
+    analysis += f"200 Day: {indicators['ma200']:.2f}\n"
+    analysis += f"Interpretation: {TREND_TEXT[signals['trend']]}\n\n"
+
+    analysis += f"Stochastic Oscillator:\n"
+    analysis += f"%K: {indicators['k']:.2f}\n"
+    analysis += f"%D: {indicators['d']:.2f}\n"
+    analysis += f"Interpretation: {OSCILLATOR_TEXT[signals['stochastic']]}\n"
+    if signals['stochastic'] == "neutral":
+        analysis += "\n"
+
+    analysis += f"Relative Strength Index (RSI): {indicators['rsi']:.2f}\n"
+    analysis += f"Interpretation: {OSCILLATOR_TEXT[signals['rsi']]}\n"
+
+    price_targets = snapshot["price_targets"]
+    if price_targets is not None:
+        analysis += f"\nAnalyst Price Targets:\n"
+        analysis += f"Current price: ${price_targets['current']:.2f}\n"
+        analysis += f"Low price: ${price_targets['low']:.2f}\n"
+        analysis += f"High price: ${price_targets['high']:.2f}\n"
+        analysis += f"Mean price: ${price_targets['mean']:.2f}\n"
+        analysis += f"Median price: ${price_targets['median']:.2f}\n"
+    else:
+        analysis += f"\nAnalyst Price Targets: Data not available\n"
+
+    return analysis
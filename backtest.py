@@ -0,0 +1,382 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import product, repeat
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import analysis
+import market_data
+from batch import DOWNLOAD_CHUNK, clean
+from indicators import MA_WINDOWS, RSI_WINDOW, STOCH_SMOOTHING, STOCH_WINDOW
+
+# Replays the analysis panel's verdicts over daily history:
+#   python main.py --backtest AAPL MSFT ... [--grid] [-o results.csv]
+# Every bar where a verdict fires is a signal, scored by the close-to-close
+# return over the next few bars. Each symbol is one task for a process
+# pool. Within a task, indicators are computed once per distinct window,
+# the verdict masks of every parameter set are stacked into one array, and
+# signal counts and return sums come out of a single matrix product.
+# Must not import PyQt5.
+
+# Bars ahead over which a signal is scored
+HORIZONS = (1, 5, 20)
+PERIOD = "5y"
+
+# Expected direction of the move after each verdict; "mixed" and "neutral"
+# predict nothing and aren't scored
+SIGNALS = {
+    "trend": {"strong_uptrend": 1, "strong_downtrend": -1, "bullish": 1, "bearish": -1},
+    "stochastic": {"overbought": -1, "oversold": 1},
+    "rsi": {"overbought": -1, "oversold": 1},
+}
+# Per signal and horizon: signals, sum and sum of squares of returns,
+# signals followed by a rise, and by a fall
+STATS = ("count", "total", "squares", "up", "down")
+
+
+def default_grid():
+    # The parameters the analysis panel uses
+    return {
+        "trend": [tuple(MA_WINDOWS[:3])],
+        "stochastic": [(STOCH_WINDOW, STOCH_SMOOTHING, analysis.STOCH_OVERBOUGHT, analysis.STOCH_OVERSOLD)],
+        "rsi": [(RSI_WINDOW, analysis.RSI_OVERBOUGHT, analysis.RSI_OVERSOLD)],
+    }
+
+
+def sweep_grid():
+    levels = [(80, 20), (90, 10), (70, 30)]
+    return {
+        "trend": [
+            (short, mid, long)
+            for short, mid, long in product((5, 10, 20), (20, 30, 50), (50, 100, 200))
+            if short < mid < long
+        ],
+        "stochastic": [
+            (window, smoothing, upper, lower)
+            for window, smoothing, (upper, lower) in product((5, 9, 14, 21), (3, 5), levels)
+        ],
+        "rsi": [
+            (window, upper, lower)
+            for window, (upper, lower) in product((7, 14, 21, 28), [(70, 30), (80, 20), (65, 35)])
+        ],
+    }
+
+
+def label(family, params):
+    if family == "trend":
+        return "MA " + "/".join(str(window) for window in params)
+    if family == "stochastic":
+        return f"{params[0]},{params[1]} {params[2]:g}/{params[3]:g}"
+    return f"{params[0]} {params[1]:g}/{params[2]:g}"
+
+
+def rolling(values, window, reduce):
+    # Like pandas' rolling(window): NaN until the window is full, and NaN
+    # whenever the window holds one
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        with np.errstate(invalid="ignore"):
+            result[window - 1:] = reduce(sliding_window_view(values, window), axis=-1)
+    return result
+
+
+def rolling_mean(values, window):
+    # pandas also gives NaN for a window holding an infinite value (a %K
+    # over a flat range), where a plain mean would give +/-inf
+    return rolling(np.where(np.isinf(values), np.nan, values), window, np.mean)
+
+
+def moving_averages(close, windows):
+    return {window: rolling_mean(close, window) for window in windows}
+
+
+def stochastic(close, high, low, windows):
+    # {window: %K}, as in the analysis panel
+    result = {}
+    for window in windows:
+        lowest = rolling(low, window, np.min)
+        highest = rolling(high, window, np.max)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[window] = 100 * ((close - lowest) / (highest - lowest))
+    return result
+
+
+def rsi(close, windows):
+    # A missing change counts as zero, as in delta.where(delta > 0, 0)
+    delta = np.diff(close, prepend=np.nan)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    result = {}
+    for window in windows:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[window] = 100 - (100 / (1 + rolling_mean(gains, window) / rolling_mean(losses, window)))
+    return result
+
+
+def trend_masks(close, high, low, combos):
+    # (combos, verdicts, bars) in SIGNALS["trend"] order. Comparisons with
+    # NaN are false, so bars without enough history fall through to "mixed".
+    mas = moving_averages(close, {window for combo in combos for window in combo})
+    short, mid, long = (np.array([mas[combo[i]] for combo in combos]) for i in range(3))
+    uptrend = (short > mid) & (mid > long)
+    downtrend = ~uptrend & (short < mid) & (mid < long)
+    # Replayed as written: these repeat the two tests above, so never fire
+    rest = ~(uptrend | downtrend)
+    bullish = rest & (short > mid) & (mid > long)
+    bearish = rest & (short < mid) & (mid < long)
+    return np.stack([uptrend, downtrend, bullish, bearish], axis=1)
+
+
+def stochastic_masks(close, high, low, combos):
+    k_by_window = stochastic(close, high, low, {combo[0] for combo in combos})
+    d_by_params = {
+        (window, smoothing): rolling_mean(k_by_window[window], smoothing)
+        for window, smoothing, _, _ in combos
+    }
+    k = np.array([k_by_window[combo[0]] for combo in combos])
+    d = np.array([d_by_params[combo[:2]] for combo in combos])
+    upper = np.array([combo[2] for combo in combos], dtype=np.float64)[:, None]
+    lower = np.array([combo[3] for combo in combos], dtype=np.float64)[:, None]
+    overbought = (k > upper) & (d > upper)
+    oversold = ~overbought & (k < lower) & (d < lower)
+    return np.stack([overbought, oversold], axis=1)
+
+
+def rsi_masks(close, high, low, combos):
+    by_window = rsi(close, {combo[0] for combo in combos})
+    values = np.array([by_window[combo[0]] for combo in combos])
+    upper = np.array([combo[1] for combo in combos], dtype=np.float64)[:, None]
+    lower = np.array([combo[2] for combo in combos], dtype=np.float64)[:, None]
+    overbought = values > upper
+    oversold = ~overbought & (values < lower)
+    return np.stack([overbought, oversold], axis=1)
+
+
+MASKS = {"trend": trend_masks, "stochastic": stochastic_masks, "rsi": rsi_masks}
+
+
+def forward_returns(close, horizons):
+    # (horizons, bars): return from this close to the close `h` bars later,
+    # NaN where the history ends first
+    result = np.full((len(horizons), len(close)), np.nan)
+    for i, h in enumerate(horizons):
+        if h < len(close):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[i, :-h] = close[h:] / close[:-h] - 1
+    return result
+
+
+def backtest_series(bars, grid, horizons=HORIZONS):
+    # {family: (combos, verdicts, STATS, horizons) array, "baseline":
+    # (STATS, horizons) over every bar}. Sums, so symbols simply add up.
+    close = bars.close.astype(np.float64)
+    high = bars.high.astype(np.float64)
+    low = bars.low.astype(np.float64)
+    returns = forward_returns(close, horizons)
+    scored = ~np.isnan(returns)
+    filled = np.where(scored, returns, 0.0)
+    # (STATS x horizons, bars), one row per statistic and horizon
+    outcomes = np.concatenate([scored, filled, filled * filled, returns > 0, returns < 0]).astype(np.float64)
+    shape = (len(STATS), len(horizons))
+    result = {"baseline": outcomes.sum(axis=1).reshape(shape)}
+    for family, combos in grid.items():
+        if not combos:
+            continue
+        masks = MASKS[family](close, high, low, combos)
+        rows = masks.reshape(-1, len(close)).astype(np.float64)
+        result[family] = (rows @ outcomes.T).reshape(masks.shape[:2] + shape)
+    return result
+
+
+def load_history(symbols, period, refresh=False):
+    # Daily bars from the on-disk store where it covers the period, the rest
+    # in one batched download per chunk. refresh also asks Yahoo for bars
+    # newer than those stored.
+    series = {}
+    missing = []
+    for symbol in symbols:
+        bars = None if refresh else market_data.get_stored_history(symbol, period, "1d")
+        if bars is None:
+            missing.append(symbol)
+        else:
+            series[symbol] = bars
+    for start in range(0, len(missing), DOWNLOAD_CHUNK):
+        chunk = missing[start:start + DOWNLOAD_CHUNK]
+        try:
+            series.update(market_data.get_many(chunk, period, "1d"))
+        except Exception as e:
+            print(f"Error: Batched download failed ({e}), fetching one by one", file=sys.stderr)
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                for symbol, bars in zip(chunk, executor.map(_history_or_none, chunk, repeat(period))):
+                    if bars is not None:
+                        series[symbol] = bars
+    return {symbol: series[symbol] for symbol in symbols if symbol in series and not series[symbol].empty}
+
+
+def _history_or_none(symbol, period):
+    try:
+        return market_data.get_history(symbol, period, "1d")
+    except Exception:
+        return None
+
+
+def run(series, grid, horizons=HORIZONS, processes=None):
+    # Totals over all symbols, see backtest_series()
+    processes = processes or os.cpu_count() or 1
+    bars_list = list(series.values())
+    if processes == 1 or len(bars_list) < 2:
+        results = map(backtest_series, bars_list, repeat(grid), repeat(horizons))
+        return _total(results, grid, horizons)
+    # BarSeries are plain arrays, so they pickle cheaply and the workers
+    # never touch the network or the store
+    chunksize = max(1, len(bars_list) // (processes * 4))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(backtest_series, bars_list, repeat(grid), repeat(horizons), chunksize=chunksize)
+        return _total(results, grid, horizons)
+
+
+def _total(results, grid, horizons):
+    totals = {"baseline": np.zeros((len(STATS), len(horizons)))}
+    for family, combos in grid.items():
+        if combos:
+            totals[family] = np.zeros((len(combos), len(SIGNALS[family]), len(STATS), len(horizons)))
+    for result in results:
+        for key, value in result.items():
+            totals[key] += value
+    return totals
+
+
+def _ratio(numerator, denominator):
+    return float(numerator / denominator) if denominator else float("nan")
+
+
+def report(totals, grid, horizons=HORIZONS):
+    # One row per scored verdict, parameter set and horizon
+    count, total, squares, up, down = range(len(STATS))
+    baseline = totals["baseline"]
+    rows = []
+    for family, combos in grid.items():
+        if not combos:
+            continue
+        for c, params in enumerate(combos):
+            for v, (verdict, direction) in enumerate(SIGNALS[family].items()):
+                hits = up if direction > 0 else down
+                for h, horizon in enumerate(horizons):
+                    stats = totals[family][c, v, :, h]
+                    mean = _ratio(stats[total], stats[count])
+                    variance = _ratio(stats[squares], stats[count]) - mean * mean
+                    rows.append({
+                        "signal": family,
+                        "verdict": verdict,
+                        "params": label(family, params),
+                        "horizon": horizon,
+                        "signals": int(stats[count]),
+                        "hit_rate": _ratio(stats[hits], stats[count]),
+                        "avg_return": mean,
+                        "std_return": float(np.sqrt(max(variance, 0.0))) if stats[count] else float("nan"),
+                        "base_hit_rate": _ratio(baseline[hits, h], baseline[count, h]),
+                        "base_return": _ratio(baseline[total, h], baseline[count, h]),
+                    })
+    return rows
+
+
+def print_report(rows, stream=sys.stdout):
+    def percent(value):
+        return "-" if value != value else f"{value:.2%}"
+
+    stream.write(
+        f"{'signal':<11}{'verdict':<17}{'params':<15}{'days':>5}{'signals':>9}"
+        f"{'hit rate':>10}{'base':>9}{'avg ret':>10}{'base':>9}\n"
+    )
+    for row in rows:
+        # Verdicts that never fired (like the trend's unreachable
+        # bullish/bearish branches) only go to the output file
+        if not row["signals"]:
+            continue
+        stream.write(
+            f"{row['signal']:<11}{row['verdict']:<17}{row['params']:<15}{row['horizon']:>5}{row['signals']:>9}"
+            f"{percent(row['hit_rate']):>10}{percent(row['base_hit_rate']):>9}"
+            f"{percent(row['avg_return']):>10}{percent(row['base_return']):>9}\n"
+        )
+
+
+def write_output(rows, output, fmt):
+    with open(output, "w", newline="") as stream:
+        if fmt == "csv":
+            writer = csv.DictWriter(stream, fieldnames=list(rows[0]) if rows else ["signal"])
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump([clean(row) for row in rows], stream, indent=2)
+            stream.write("\n")
+
+
+def parse_params(text, size):
+    values = tuple(float(value) if "." in value else int(value) for value in text.split(","))
+    if len(values) != size:
+        raise argparse.ArgumentTypeError(f"expected {size} comma-separated numbers, got {text!r}")
+    return values
+
+
+def horizon(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"horizons are bars ahead and must be at least 1, got {text!r}")
+    return value
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="main.py --backtest", description="Backtest the analysis verdicts over daily history.")
+    parser.add_argument("symbols", nargs="*", help="ticker symbols")
+    parser.add_argument("--symbols-file", help="file with one symbol per line")
+    parser.add_argument("--period", default=PERIOD, help=f"daily history to replay (default: {PERIOD})")
+    parser.add_argument("--horizons", type=horizon, nargs="+", default=list(HORIZONS), help="bars ahead to score each signal over (default: 1 5 20)")
+    parser.add_argument("--grid", action="store_true", help="sweep a grid of windows and levels instead of the app's parameters")
+    parser.add_argument("--ma", nargs="+", type=lambda text: parse_params(text, 3), metavar="SHORT,MID,LONG", help="moving average windows to test")
+    parser.add_argument("--stochastic", nargs="+", type=lambda text: parse_params(text, 4), metavar="K,D,HIGH,LOW", help="stochastic windows and levels to test")
+    parser.add_argument("--rsi", nargs="+", type=lambda text: parse_params(text, 3), metavar="WINDOW,HIGH,LOW", help="RSI windows and levels to test")
+    parser.add_argument("--processes", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--refresh", action="store_true", help="fetch bars newer than those stored")
+    parser.add_argument("-o", "--output", help="also write every row to a file")
+    parser.add_argument("--format", choices=["json", "csv"], help="output format (default: from the file extension, else json)")
+    args = parser.parse_args(argv)
+
+    symbols = [symbol.upper() for symbol in args.symbols]
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            symbols += [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        parser.error("no symbols given")
+
+    grid = sweep_grid() if args.grid else default_grid()
+    for family, custom in (("trend", args.ma), ("stochastic", args.stochastic), ("rsi", args.rsi)):
+        if custom:
+            grid[family] = custom
+    horizons = tuple(args.horizons)
+
+    start = time.perf_counter()
+    series = load_history(symbols, args.period, refresh=args.refresh)
+    loaded = time.perf_counter()
+    if not series:
+        print("Error: No price data for any symbol", file=sys.stderr)
+        return 1
+    totals = run(series, grid, horizons, processes=args.processes)
+    rows = report(totals, grid, horizons)
+    print_report(rows)
+    if args.output:
+        write_output(rows, args.output, args.format or ("csv" if args.output.endswith(".csv") else "json"))
+    combos = sum(len(combos) for combos in grid.values())
+    bars = sum(len(bars) for bars in series.values())
+    print(
+        f"{combos} parameter sets over {len(series)} of {len(symbols)} symbols ({bars} bars): "
+        f"loaded in {loaded - start:.1f}s, backtested in {time.perf_counter() - loaded:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
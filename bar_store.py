@@ -0,0 +1,165 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from paths import data_dir
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Stored in place of an unbounded period such as "max"
+ALL_HISTORY_DAYS = 1_000_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    tz TEXT,
+    covered_days INTEGER NOT NULL,
+    synced_at REAL,
+    PRIMARY KEY (symbol, interval)
+);
+CREATE TABLE IF NOT EXISTS indicator_state (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+
+def default_path():
+    return os.path.join(data_dir(), "bars.sqlite")
+
+
+def to_epoch_ms(index):
+    # Naive timestamps are taken to be UTC
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return np.asarray(index, dtype="datetime64[ms]").astype(np.int64)
+
+
+class BarStore:
+    # OHLCV bars on disk, one SQLite row per bar clustered by
+    # (symbol, interval, ts) so reading a symbol's recent history is a single
+    # range scan. Reads are memory-mapped and only pull the requested window.
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        # Stores written before synced_at was recorded
+        if "synced_at" not in [row[1] for row in conn.execute("PRAGMA table_info(series)")]:
+            conn.execute("ALTER TABLE series ADD COLUMN synced_at REAL")
+
+    def _conn(self):
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        return conn
+
+    def series_info(self, symbol, interval):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT tz, covered_days, synced_at FROM series WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchone()
+        if row is None:
+            return None
+        latest = conn.execute(
+            "SELECT ts FROM bars WHERE symbol = ? AND interval = ? ORDER BY ts DESC LIMIT 2", (symbol, interval)
+        ).fetchall()
+        if not latest:
+            return None
+        return {
+            "tz": row[0],
+            "covered_days": row[1],
+            "last_ts": latest[0][0],
+            # The newest bar may still be forming; the one before it is final
+            "prev_ts": latest[-1][0],
+            # When bars from Yahoo were last saved, in epoch seconds
+            "synced_at": row[2],
+        }
+
+    def load(self, symbol, interval, since_ms=None, tz=None):
+        rows = self._conn().execute(
+            "SELECT ts, open, high, low, close, volume FROM bars "
+            "WHERE symbol = ? AND interval = ? AND ts >= ? ORDER BY ts",
+            (symbol, interval, since_ms if since_ms is not None else -(2 ** 62)),
+        ).fetchall()
+        if tz is None:
+            info = self.series_info(symbol, interval)
+            tz = info["tz"] if info else None
+        index = pd.to_datetime([row[0] for row in rows], unit="ms", utc=True)
+        if tz:
+            index = index.tz_convert(tz)
+        frame = pd.DataFrame([row[1:] for row in rows], index=index, columns=COLUMNS, dtype="float64")
+        frame["Volume"] = frame["Volume"].fillna(0).astype("int64")
+        return frame
+
+    def save(self, symbol, interval, frame, covered_days=None):
+        if frame.empty:
+            return
+        timestamps = to_epoch_ms(frame.index)
+        volume = frame["Volume"].fillna(0).astype("int64").to_numpy()
+        prices = frame[["Open", "High", "Low", "Close"]].astype("float64").to_numpy()
+        rows = [
+            (symbol, interval, int(ts), *(None if p != p else float(p) for p in price), int(vol))
+            for ts, price, vol in zip(timestamps, prices, volume)
+        ]
+        tz = str(frame.index.tz) if frame.index.tz is not None else None
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            current = conn.execute(
+                "SELECT tz, covered_days FROM series WHERE symbol = ? AND interval = ?", (symbol, interval)
+            ).fetchone()
+            if current:
+                # Batched downloads come back in UTC; keep the exchange zone
+                tz = current[0] or tz
+            days = max(covered_days or 0, current[1] if current else 0)
+            conn.execute(
+                "INSERT OR REPLACE INTO series (symbol, interval, tz, covered_days, synced_at) VALUES (?, ?, ?, ?, ?)",
+                (symbol, interval, tz, days, time.time()),
+            )
+
+    def load_state(self, symbol, interval):
+        row = self._conn().execute(
+            "SELECT state FROM indicator_state WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_state(self, symbol, interval, state):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO indicator_state VALUES (?, ?, ?)", (symbol, interval, json.dumps(state))
+            )
+
+    def clear(self, symbol, interval):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (symbol, interval))
+            conn.execute("DELETE FROM series WHERE symbol = ? AND interval = ?", (symbol, interval))
+            conn.execute("DELETE FROM indicator_state WHERE symbol = ? AND interval = ?", (symbol, interval))
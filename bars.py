@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from bar_store import to_epoch_ms
+
+# Compact price history. yfinance frames are converted once at ingest into
+# contiguous arrays: epoch-ms int64 timestamps, float32 prices and int64
+# volume. That is 32 bytes per bar, so 10,000 bars take 312 KiB (plus under
+# 1 KiB of object and array headers), against 625 KiB for the DataFrame
+# yfinance returns (Open/High/Low/Close/Volume/Dividends/Stock Splits and its
+# DatetimeIndex; see benchmarks/bench_bar_memory.py). Slices are NumPy views,
+# so chart windows and indicator lookbacks copy nothing.
+
+FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+
+class BarSeries:
+    __slots__ = FIELDS + ("tz",)
+
+    def __init__(self, ts, open, high, low, close, volume, tz=None):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        # Exchange time zone, for display only; timestamps are UTC
+        self.tz = tz
+
+    @classmethod
+    def from_frame(cls, frame):
+        count = len(frame)
+
+        def prices(column):
+            if column not in frame:
+                return np.full(count, np.nan, dtype=np.float32)
+            return frame[column].to_numpy(dtype=np.float32)
+
+        if "Volume" in frame:
+            volume = frame["Volume"].fillna(0).to_numpy(dtype=np.int64)
+        else:
+            volume = np.zeros(count, dtype=np.int64)
+        tz = getattr(frame.index, "tz", None)
+        return cls(
+            to_epoch_ms(frame.index),
+            prices("Open"), prices("High"), prices("Low"), prices("Close"), volume,
+            str(tz) if tz is not None else None,
+        )
+
+    @classmethod
+    def empty_series(cls, tz=None):
+        prices = np.empty(0, dtype=np.float32)
+        return cls(np.empty(0, dtype=np.int64), prices, prices, prices, prices, np.empty(0, dtype=np.int64), tz)
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def empty(self):
+        return len(self.ts) == 0
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, field).nbytes for field in FIELDS)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("BarSeries only supports slicing")
+        return BarSeries(*(getattr(self, field)[key] for field in FIELDS), tz=self.tz)
+
+    def tail(self, count):
+        return self[max(len(self) - count, 0):]
+
+    def since(self, start_ms):
+        # Bars at or after start_ms
+        return self[int(np.searchsorted(self.ts, start_ms, side="left")):]
+
+    def to_frame(self):
+        index = pd.to_datetime(self.ts, unit="ms", utc=True)
+        if self.tz:
+            index = index.tz_convert(self.tz)
+        return pd.DataFrame({
+            "Open": self.open.astype(np.float64),
+            "High": self.high.astype(np.float64),
+            "Low": self.low.astype(np.float64),
+            "Close": self.close.astype(np.float64),
+            "Volume": self.volume,
+        }, index=index)
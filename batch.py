@@ -0,0 +1,113 @@
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import analysis
+import market_data
+
+# Headless snapshot mode: python main.py --batch AAPL MSFT ... -o out.json
+# Must not import PyQt5 so it runs on servers without a display.
+
+# Histories are warmed with one grouped download per chunk of symbols
+DOWNLOAD_CHUNK = 100
+
+CSV_COLUMNS = (
+    ["symbol", "error"]
+    + analysis.FUNDAMENTAL_FIELDS
+    + ["ma10", "ma30", "ma50", "ma200", "k", "d", "rsi"]
+    + ["trend", "stochastic_signal", "rsi_signal"]
+    + [f"target_{field}" for field in analysis.PRICE_TARGET_FIELDS]
+)
+
+
+def snapshot_or_error(symbol):
+    try:
+        return analysis.compute_snapshot(symbol)
+    except Exception as e:
+        return {"symbol": symbol, "error": str(e)}
+
+
+def run(symbols, workers=16, processes=False):
+    for start in range(0, len(symbols), DOWNLOAD_CHUNK):
+        try:
+            market_data.prefetch(symbols[start:start + DOWNLOAD_CHUNK], "1y", "1d")
+        except Exception as e:
+            print(f"Error: Batched download failed ({e}), fetching one by one", file=sys.stderr)
+    # Threads share the warmed cache; processes help when the indicator
+    # work rather than the network is the bottleneck.
+    executor = ProcessPoolExecutor(max_workers=workers) if processes else ThreadPoolExecutor(max_workers=workers)
+    with executor:
+        return list(executor.map(snapshot_or_error, symbols))
+
+
+def clean(value):
+    # JSON has no NaN or infinity
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: clean(item) for key, item in value.items()}
+    return value
+
+
+def flatten(snapshot):
+    row = {"symbol": snapshot["symbol"], "error": snapshot.get("error", "")}
+    if "error" in snapshot:
+        return row
+    row.update(snapshot["fundamentals"])
+    row.update(snapshot["indicators"])
+    row["trend"] = snapshot["signals"]["trend"]
+    row["stochastic_signal"] = snapshot["signals"]["stochastic"]
+    row["rsi_signal"] = snapshot["signals"]["rsi"]
+    for field, value in (snapshot["price_targets"] or {}).items():
+        row[f"target_{field}"] = value
+    return clean(row)
+
+
+def write_output(snapshots, output, fmt):
+    stream = sys.stdout if output == "-" else open(output, "w", newline="")
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for snapshot in snapshots:
+                writer.writerow(flatten(snapshot))
+        else:
+            json.dump([clean(snapshot) for snapshot in snapshots], stream, indent=2)
+            stream.write("\n")
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="main.py --batch", description="Write analysis snapshots for many symbols.")
+    parser.add_argument("symbols", nargs="*", help="ticker symbols")
+    parser.add_argument("--symbols-file", help="file with one symbol per line")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=["json", "csv"], help="output format (default: from the file extension, else json)")
+    parser.add_argument("--workers", type=int, default=16, help="parallel workers (default: 16)")
+    parser.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    args = parser.parse_args(argv)
+
+    symbols = [symbol.upper() for symbol in args.symbols]
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            symbols += [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        parser.error("no symbols given")
+
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "json")
+    start = time.perf_counter()
+    snapshots = run(symbols, workers=args.workers, processes=args.processes)
+    write_output(snapshots, args.output, fmt)
+    failed = sum(1 for snapshot in snapshots if "error" in snapshot)
+    print(
+        f"{len(snapshots)} snapshots ({failed} failed) in {time.perf_counter() - start:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if failed == len(snapshots) else 0
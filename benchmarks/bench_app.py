@@ -0,0 +1,230 @@
+# Times the GUI refresh paths against recorded (or synthetic) market data,
+# headless on the offscreen Qt platform.
+#
+#   python benchmarks/bench_app.py                       # replay, write results
+#   python benchmarks/bench_app.py --record              # record fixtures from Yahoo
+#   python benchmarks/bench_app.py --compare benchmarks/results/<old>.json
+#   python benchmarks/bench_app.py --latency 150         # startup with round trips
+#
+# Each case is timed from the call until every job it started has delivered
+# its result to the widgets. "cold" runs start from empty caches and an empty
+# bar store, "warm" runs repeat the call with everything cached. Startup is
+# timed too: the app's own, and its data fetched one symbol at a time (as
+# before batching) against one batched download.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Replayed answers need no throttling; set a real value to include it
+os.environ.setdefault("STOCKSNAPSHOT_RATE_LIMIT", "100000")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtWidgets import QApplication
+
+from replay_yfinance import FakeYahoo
+
+CHART_PERIODS = ["1d", "5d", "1mo", "6mo", "1y", "5y", "max"]
+INDEX_PERIODS = ["1d", "5d", "1mo"]
+
+
+def wait_for_jobs(app, window, channels=None, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while True:
+        pending = [
+            channel for channel, _, _, _ in window.workers.jobs.values()
+            if channels is None or channel in channels
+        ]
+        if not pending:
+            return
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"jobs still running: {pending}")
+        app.processEvents(QEventLoop.AllEvents, 5)
+        time.sleep(0.001)
+
+
+def start_app(app):
+    # The window and the seconds from its creation until the startup data
+    # has arrived and the first tab is loaded
+    import main
+    start = time.perf_counter()
+    window = main.StockApp(startup_hook=lambda stage, seconds: None)
+    window.show()
+    while not window.data_ready:
+        app.processEvents(QEventLoop.AllEvents, 5)
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    wait_for_jobs(app, window)
+    return window, elapsed
+
+
+def reset(data_root):
+    # Empty in-memory caches and a fresh bar store
+    import market_data
+    os.environ["STOCKSNAPSHOT_DATA_DIR"] = tempfile.mkdtemp(dir=data_root)
+    market_data.clear_caches()
+
+
+def time_case(app, window, action, channels):
+    start = time.perf_counter()
+    action()
+    wait_for_jobs(app, window, channels)
+    elapsed = time.perf_counter() - start
+    # Let background warming finish so it doesn't bleed into the next case
+    wait_for_jobs(app, window)
+    return elapsed
+
+
+def summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def time_startup_prefetch(symbols, data_root, repeat):
+    # The startup data for the watchlist and the current symbol, fetched
+    # one request per symbol in turn (as startup did before batching), in
+    # one batched request, and read back from the bar store after a restart
+    # within the cache TTL. Use --latency to see the round trips.
+    import market_data
+
+    def restart():
+        market_data.prefetch(symbols, "1d", "5m")
+        market_data.clear_caches()
+
+    fetches = {
+        "sequential": (None, lambda: [market_data.get_history(symbol, "1d", "5m") for symbol in symbols]),
+        "batched": (None, lambda: market_data.prefetch(symbols, "1d", "5m")),
+        "restart": (restart, lambda: market_data.prefetch(symbols, "1d", "5m")),
+    }
+    results = []
+    for mode, (prepare, fetch) in fetches.items():
+        samples = []
+        for _ in range(repeat):
+            reset(data_root)
+            if prepare:
+                prepare()
+            start = time.perf_counter()
+            fetch()
+            samples.append(time.perf_counter() - start)
+        entry = {"case": "startup_prefetch", "mode": mode, "rows": len(symbols), "cold": summarize(samples)}
+        results.append(entry)
+        print(f"{'startup_prefetch':22} {json.dumps({'mode': mode}):28} rows={len(symbols):>6}  "
+              f"cold {entry['cold']['median_ms']:9.1f} ms")
+    return results
+
+
+def run(app, window, data_root, repeat):
+    results = time_startup_prefetch(window.startup_symbols(), data_root, repeat)
+
+    def measure(case, action, channels, rows=None, **params):
+        cold, warm = [], []
+        for _ in range(repeat):
+            reset(data_root)
+            cold.append(time_case(app, window, action, channels))
+            warm.append(time_case(app, window, action, channels))
+        entry = {"case": case, **params, "rows": rows() if rows else None, "cold": summarize(cold), "warm": summarize(warm)}
+        results.append(entry)
+        print(f"{case:22} {json.dumps(params):28} rows={entry['rows']!s:>6}  "
+              f"cold {entry['cold']['median_ms']:9.1f} ms  warm {entry['warm']['median_ms']:9.1f} ms")
+
+    chart_rows = lambda: len(window.stock_chart.x)
+    for period in CHART_PERIODS:
+        measure("update_chart_period", lambda: window.update_chart_period(period), {"chart"}, chart_rows, period=period)
+        measure("update_stock", lambda: window.update_stock("MSFT"), {"chart", "analysis"}, chart_rows, period=period)
+
+    window.tab_widget.setCurrentWidget(window.indices_tab)
+    wait_for_jobs(app, window)
+    index_rows = lambda: sum(len(controller.x) for controller in window.index_charts)
+    for period in INDEX_PERIODS:
+        measure("update_indices_charts", lambda: window.update_indices_charts(period), {"indices"}, index_rows, period=period)
+
+    window.tab_widget.setCurrentWidget(window.competitors_tab)
+    wait_for_jobs(app, window)
+    measure("update_competitors", window.update_competitors, {"competitors"}, window.competitors_table.rowCount)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(HERE), text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, old_path):
+    with open(old_path) as f:
+        old = {json.dumps([r["case"], r.get("period") or r.get("mode")]): r for r in json.load(f)["results"]}
+    print(f"\nvs {old_path} (warm and cold medians, new / old):")
+    for entry in results:
+        variant = entry.get("period") or entry.get("mode")
+        before = old.get(json.dumps([entry["case"], variant]))
+        if before is None:
+            continue
+        ratios = [
+            f"{kind} x{entry[kind]['median_ms'] / max(before[kind]['median_ms'], 1e-9):.2f}"
+            for kind in ("cold", "warm") if kind in entry and kind in before
+        ]
+        print(f"{entry['case']:22} {variant or '':10} {'  '.join(ratios)}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Time the app's refresh paths offline.")
+    parser.add_argument("--fixtures", default=os.path.join(HERE, "fixtures"), help="recorded market data folder")
+    parser.add_argument("--record", action="store_true", help="fetch from Yahoo and save fixtures")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (default: 3)")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated network latency per call, in ms")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    data_root = tempfile.mkdtemp(prefix="stocksnapshot-bench-")
+    os.environ["STOCKSNAPSHOT_DATA_DIR"] = os.path.join(data_root, "startup")
+    fake = FakeYahoo(args.fixtures, mode="record" if args.record else "replay", latency=args.latency / 1000).install()
+    app = QApplication(sys.argv[:1])
+    window, startup = start_app(app)
+    print(f"{'startup':22} {'':28} {'':11} cold {startup * 1000:9.1f} ms")
+    results = [{"case": "startup", "rows": len(window.startup_symbols()), "cold": summarize([startup])}]
+    results += run(app, window, data_root, 1 if args.record else args.repeat)
+    window.close()
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": fake.mode,
+            "recorded_answers": len(fake.fixtures),
+            "latency_ms": args.latency,
+            "repeat": args.repeat,
+            "calls": fake.calls,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(HERE, "results", time.strftime("%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
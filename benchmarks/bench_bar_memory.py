@@ -0,0 +1,21 @@
+# Memory held per 10,000 bars: the DataFrame yfinance returns versus the
+# BarSeries the app caches after ingest.
+#
+#   python benchmarks/bench_bar_memory.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bars import BarSeries
+from replay_yfinance import synthetic_history
+
+if __name__ == "__main__":
+    frame = synthetic_history("AAPL", "max", "1d").iloc[-10_000:]
+    bars = BarSeries.from_frame(frame)
+    frame_bytes = int(frame.memory_usage(index=True, deep=True).sum())
+    print(f"DataFrame ({', '.join(frame.columns)}): {frame_bytes / 1024:.0f} KiB per {len(frame):,} bars")
+    print(f"BarSeries: {bars.nbytes / 1024:.0f} KiB per {len(bars):,} bars ({bars.nbytes // len(bars)} bytes/bar)")
+    window = bars.tail(252)
+    print(f"tail(252) shares memory with the series: {window.close.base is not None}")
@@ -0,0 +1,64 @@
+# Micro-benchmark: filling chart series row by row (the old iterrows path)
+# versus the bulk NumPy path in chart_data/charts.
+#
+#   QT_QPA_PLATFORM=offscreen python benchmarks/bench_chart_points.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtChart import QBarSet, QLineSeries
+from PyQt5.QtCore import QDateTime
+from PyQt5.QtWidgets import QApplication
+
+from bars import BarSeries
+from chart_data import line_arrays, volume_array
+from charts import set_bar_data, set_line_data
+
+
+def make_bars(count):
+    index = pd.date_range("2024-01-02 09:30", periods=count, freq="5min", tz="America/New_York")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.2, count))
+    volume = np.random.default_rng(1).integers(1_000, 100_000, count)
+    return pd.DataFrame({"Close": close, "Volume": volume}, index=index)
+
+
+def fill_iterrows(frame):
+    series = QLineSeries()
+    volume_set = QBarSet("")
+    for index, row in frame.iterrows():
+        date_time = QDateTime()
+        date_time.setSecsSinceEpoch(int(index.timestamp()))
+        series.append(date_time.toMSecsSinceEpoch(), row['Close'])
+        volume_set.append(row['Volume'])
+
+
+def fill_bulk(frame):
+    series = QLineSeries()
+    volume_set = QBarSet("")
+    bars = BarSeries.from_frame(frame)
+    set_line_data(series, *line_arrays(bars))
+    set_bar_data(volume_set, volume_array(bars))
+
+
+def points_per_second(fill, frame, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fill(frame)
+        best = min(best, time.perf_counter() - start)
+    return len(frame) / best
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    # 1d, 5d and 1mo of 5m bars, plus a long range
+    for count in (78, 390, 1_638, 20_000):
+        frame = make_bars(count)
+        before = points_per_second(fill_iterrows, frame)
+        after = points_per_second(fill_bulk, frame)
+        print(f"{count:>7} bars: iterrows {before:>12,.0f} pts/s  bulk {after:>12,.0f} pts/s  ({after / before:.1f}x)")
@@ -0,0 +1,103 @@
+# Checks the streaming IndicatorEngine against the pandas formulas the
+# analysis panel used to run, then times a single-bar update.
+#
+#   python benchmarks/bench_indicators.py
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from indicators import IndicatorEngine
+
+
+def pandas_indicators(stock_data):
+    # Same calculations as the original update_analysis
+    values = {}
+    for window in (10, 30, 50, 200):
+        values[f"ma{window}"] = stock_data['Close'].rolling(window=window).mean()
+    low_14 = stock_data['Low'].rolling(window=14).min()
+    high_14 = stock_data['High'].rolling(window=14).max()
+    values["k"] = 100 * ((stock_data['Close'] - low_14) / (high_14 - low_14))
+    values["d"] = values["k"].rolling(window=3).mean()
+    delta = stock_data['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    values["rsi"] = 100 - (100 / (1 + rs))
+    return values
+
+
+def fixture(count, seed, flat=False, gaps=False, spike=False):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    if flat:
+        close[count // 3: count // 3 + 40] = close[count // 3]
+    high = close + rng.uniform(0, 2, count)
+    low = close - rng.uniform(0, 2, count)
+    if flat:
+        high[count // 3: count // 3 + 40] = low[count // 3: count // 3 + 40] = close[count // 3]
+    if spike:
+        # A flat 20-bar range ending just past the middle, with the last two
+        # closes outside it: pandas gives %K = +inf, then -inf. The engine
+        # state is saved and reloaded with both in the %D window.
+        middle = count // 2
+        level = close[middle - 20]
+        high[middle - 20: middle + 1] = low[middle - 20: middle + 1] = level
+        close[middle - 20: middle - 1] = level
+        close[middle - 1], close[middle] = level + 1, level - 1
+    frame = pd.DataFrame({"High": high, "Low": low, "Close": close})
+    if gaps:
+        frame.iloc[count // 2] = np.nan
+    return frame
+
+
+def same(a, b):
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def check(frame):
+    expected = pandas_indicators(frame)
+    engine = IndicatorEngine()
+    rows = list(frame.itertuples())
+    for i, row in enumerate(rows):
+        # Compare the provisional snapshot, then commit the bar and compare again
+        provisional = engine.snapshot((i, row.High, row.Low, row.Close))
+        engine.push(i, row.High, row.Low, row.Close)
+        if i == len(rows) // 2:
+            engine = IndicatorEngine.from_state(engine.state())
+        for values in (provisional, engine.snapshot()):
+            for name, series in expected.items():
+                if not same(values[name], series.iloc[i]):
+                    raise AssertionError(f"{name} at bar {i}: {values[name]} != {series.iloc[i]}")
+
+
+if __name__ == "__main__":
+    fixtures = [
+        ("random walk", fixture(2_000, 0)),
+        ("flat run", fixture(500, 1, flat=True)),
+        ("missing bar", fixture(500, 2, gaps=True)),
+        ("close outside a flat range", fixture(500, 5, spike=True)),
+        ("short history", fixture(120, 3)),
+    ]
+    for name, frame in fixtures:
+        check(frame)
+        print(f"match: {name} ({len(frame)} bars)")
+
+    frame = fixture(100_000, 4)
+    bars = list(zip(frame["High"].tolist(), frame["Low"].tolist(), frame["Close"].tolist()))
+    engine = IndicatorEngine()
+    start = time.perf_counter()
+    for i, (high, low, close) in enumerate(bars):
+        engine.push(i, high, low, close)
+    per_update = (time.perf_counter() - start) / len(bars)
+    start = time.perf_counter()
+    pandas_indicators(frame.iloc[-252:])
+    full_year = time.perf_counter() - start
+    print(f"streaming update: {per_update * 1e6:.1f} us/bar; pandas full 1y recompute: {full_year * 1e3:.2f} ms")
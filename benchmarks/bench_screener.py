@@ -0,0 +1,37 @@
+# Times the vectorized screener over a synthetic universe and checks it
+# against the per-symbol pandas formulas.
+#
+#   python benchmarks/bench_screener.py [symbols]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bars import BarSeries
+from bench_indicators import fixture, pandas_indicators, same
+from screener import screen
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    # One year of daily bars, with a few short histories mixed in
+    universe = {f"S{i:04d}": BarSeries.from_frame(fixture(60 if i % 50 == 0 else 252, i)) for i in range(count)}
+    # Cut two bars after a close outside a flat range, so %D averages a -inf %K
+    universe["S0001"] = BarSeries.from_frame(fixture(504, 1, spike=True).iloc[:255])
+    # Histories just short of, and just long enough for, an RSI
+    universe["S0002"] = BarSeries.from_frame(fixture(10, 2))
+    universe["S0003"] = BarSeries.from_frame(fixture(14, 3))
+
+    start = time.perf_counter()
+    result = screen(universe)
+    elapsed = time.perf_counter() - start
+    print(f"screened {count} symbols in {elapsed * 1e3:.1f} ms")
+
+    for symbol in list(universe)[:25]:
+        # Reference values from the same (float32) prices the screener sees
+        expected = pandas_indicators(universe[symbol].to_frame())
+        for name, series in expected.items():
+            if not same(result.loc[symbol, name], series.iloc[-1]):
+                raise AssertionError(f"{symbol} {name}: {result.loc[symbol, name]} != {series.iloc[-1]}")
+    print("match: first 25 symbols")
@@ -0,0 +1,128 @@
+# Times the watchlist table with hundreds to thousands of symbols, headless:
+# fetching a cycle's bars (batched, against replayed Yahoo answers), turning
+# them into quotes (worker side), applying a refresh where a few rows
+# changed, and repainting the view. Paint cost should follow the rows on
+# screen, not the length of the list. The fetch runs without the rate limit,
+# which is reported separately next to the refresh interval it leads to.
+#
+#   python benchmarks/bench_watchlist.py
+#   python benchmarks/bench_watchlist.py --sizes 500 2000 --changed 0.05 --latency 100
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# The rate limit the refresh interval is sized for; the fetch itself is
+# timed unthrottled
+RATE_LIMIT = float(os.environ.get("STOCKSNAPSHOT_RATE_LIMIT", "5"))
+os.environ["STOCKSNAPSHOT_RATE_LIMIT"] = "100000"
+os.environ["STOCKSNAPSHOT_DATA_DIR"] = tempfile.mkdtemp(prefix="stocksnapshot-bench-")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from PyQt5.QtWidgets import QApplication, QTableView
+
+import market_data
+from bars import BarSeries
+from chart_data import session_quote
+from main import watchlist_interval
+from replay_yfinance import FakeYahoo
+from watchlist import SPARKLINE_COLUMN, SparklineDelegate, WatchlistModel
+
+BAR_MS = 5 * 60 * 1000
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def five_days(rng):
+    # 5 sessions of 78 five-minute bars
+    ts = (np.arange(5)[:, None] * DAY_MS + np.arange(78)[None, :] * BAR_MS).ravel().astype(np.int64)
+    close = (100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(ts))))).astype(np.float32)
+    volume = rng.integers(1000, 100000, len(ts))
+    return BarSeries(ts, close, close, close, close, volume)
+
+
+def best(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def run(app, size, changed_share, rng, rate):
+    symbols = [f"S{i:04d}" for i in range(size)]
+
+    # What StockApp.watchlist_quotes fetches each cycle
+    market_data.clear_caches()
+    start = time.perf_counter()
+    market_data.get_many(symbols, "5d", "5m")
+    fetch_ms = (time.perf_counter() - start) * 1000
+    print(
+        f"{size:6} symbols  fetch {fetch_ms:8.1f} ms unthrottled, at least {size / rate:.0f} s at {rate:g}/s: "
+        f"refresh every {watchlist_interval(size, rate):.0f} s"
+    )
+
+    series = {symbol: five_days(rng) for symbol in symbols}
+
+    start = time.perf_counter()
+    quotes = {symbol: session_quote(bars) for symbol, bars in series.items()}
+    quote_ms = (time.perf_counter() - start) * 1000
+
+    # Nothing is added or removed, so the list is never saved
+    model = WatchlistModel(symbols)
+    view = QTableView()
+    view.setModel(model)
+    view.setItemDelegateForColumn(SPARKLINE_COLUMN, SparklineDelegate(view))
+    view.verticalHeader().setDefaultSectionSize(24)
+    view.resize(340, 800)
+    view.show()
+    app.processEvents()
+
+    signals = []
+    model.dataChanged.connect(lambda first, last: signals.append(last.row() - first.row() + 1))
+    start = time.perf_counter()
+    model.update_quotes(quotes)
+    app.processEvents()
+    first_ms = (time.perf_counter() - start) * 1000
+
+    # A later cycle: only some symbols moved
+    moved = rng.choice(size, max(1, int(size * changed_share)), replace=False)
+    refreshed = dict(quotes)
+    for row in moved:
+        last, change, spark = quotes[symbols[row]]
+        refreshed[symbols[row]] = (last * 1.001, change, spark)
+    signals.clear()
+    start = time.perf_counter()
+    rows = model.update_quotes(refreshed)
+    app.processEvents()
+    refresh_ms = (time.perf_counter() - start) * 1000
+
+    paint_ms = best(lambda: view.viewport().repaint())
+    print(
+        f"{size:6} symbols  quotes {quote_ms:8.1f} ms  first fill {first_ms:7.1f} ms  "
+        f"refresh {refresh_ms:6.1f} ms ({len(rows)} rows, {len(signals)} dataChanged)  repaint {paint_ms:5.2f} ms"
+    )
+    view.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the watchlist table at scale.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000, 5000])
+    parser.add_argument("--changed", type=float, default=0.05, help="share of rows changed per refresh")
+    parser.add_argument("--latency", type=float, default=20.0, help="simulated network latency per batched download, in ms")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="rate limit to size the refresh interval for")
+    args = parser.parse_args()
+
+    # An empty fixtures folder: every answer is synthetic
+    FakeYahoo(tempfile.mkdtemp(prefix="stocksnapshot-fixtures-"), latency=args.latency / 1000).install()
+    app = QApplication(sys.argv[:1])
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        run(app, size, args.changed, rng, args.rate)
@@ -0,0 +1,124 @@
+# Checks the vectorized backtest against the app's own rules (the streaming
+# IndicatorEngine and the analysis verdict functions, bar by bar), then
+# times a parameter sweep over a synthetic universe, in one process and
+# over a process pool.
+#
+#   python benchmarks/check_backtest.py
+#   python benchmarks/check_backtest.py --symbols 1000 --bars 2520
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import analysis
+import backtest
+from bars import BarSeries
+from bench_indicators import fixture, same
+from indicators import IndicatorEngine
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        raise SystemExit(1)
+
+
+def replay(bars, horizons):
+    # The slow way: push every bar through the app's engine and verdicts,
+    # scoring each directional verdict by hand
+    grid = backtest.default_grid()
+    close = bars.close.astype(np.float64)
+    engine = IndicatorEngine()
+    values = []
+    totals = {family: np.zeros((1, len(backtest.SIGNALS[family]), len(backtest.STATS), len(horizons))) for family in grid}
+    for i in range(len(bars)):
+        engine.push(i, float(bars.high[i]), float(bars.low[i]), float(bars.close[i]))
+        snapshot = engine.snapshot()
+        values.append(snapshot)
+        verdicts = {
+            "trend": analysis.trend_signal(snapshot["ma10"], snapshot["ma30"], snapshot["ma50"]),
+            "stochastic": analysis.stochastic_signal(snapshot["k"], snapshot["d"]),
+            "rsi": analysis.rsi_signal(snapshot["rsi"]),
+        }
+        for family, verdict in verdicts.items():
+            if verdict not in backtest.SIGNALS[family]:
+                continue
+            v = list(backtest.SIGNALS[family]).index(verdict)
+            for h, horizon in enumerate(horizons):
+                if i + horizon >= len(bars):
+                    continue
+                change = close[i + horizon] / close[i] - 1
+                if not math.isnan(change):
+                    totals[family][0, v, :, h] += [1, change, change * change, change > 0, change < 0]
+    return values, totals
+
+
+def check_parity(bars, name, horizons=backtest.HORIZONS):
+    close = bars.close.astype(np.float64)
+    high = bars.high.astype(np.float64)
+    low = bars.low.astype(np.float64)
+    values, expected = replay(bars, horizons)
+    mas = backtest.moving_averages(close, (10, 30, 50, 200))
+    k = backtest.stochastic(close, high, low, (14,))[14]
+    d = backtest.rolling_mean(k, 3)
+    rsi = backtest.rsi(close, (14,))[14]
+    vectorized = {**{f"ma{window}": series for window, series in mas.items()}, "k": k, "d": d, "rsi": rsi}
+    # The engine keeps running sums, so allow for rounding
+    differ = [
+        (name, i) for i, snapshot in enumerate(values) for name, series in vectorized.items()
+        if not (same(snapshot[name], series[i]) or math.isclose(snapshot[name], series[i], rel_tol=1e-7, abs_tol=1e-7))
+    ]
+    check(f"{name}: indicators match IndicatorEngine on all {len(values)} bars", not differ)
+    got = backtest.backtest_series(bars, backtest.default_grid(), horizons)
+    for family in expected:
+        check(
+            f"{name}: {family} signals and returns match the analysis verdicts",
+            np.allclose(got[family], expected[family], rtol=1e-9, atol=1e-9),
+        )
+
+
+def positive(frame):
+    # Shift a random walk up so prices, and so returns, stay meaningful
+    return frame + (5 - min(frame["Low"].min(), 0))
+
+
+def universe(count, length):
+    return {f"S{i:04d}": BarSeries.from_frame(positive(fixture(length, i))) for i in range(count)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and time the backtest.")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=1260, help="daily bars per symbol (default: 5 years)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    for name, frame in [
+        ("random walk", fixture(1500, 0)),
+        ("flat run", fixture(500, 1, flat=True)),
+        ("missing bar", fixture(500, 2, gaps=True)),
+        ("close outside a flat range", fixture(500, 5, spike=True)),
+        ("short history", fixture(40, 3)),
+    ]:
+        check_parity(BarSeries.from_frame(positive(frame)), name)
+
+    grid = backtest.sweep_grid()
+    combos = sum(len(combos) for combos in grid.values())
+    series = universe(args.symbols, args.bars)
+    print(f"{combos} parameter sets x {args.symbols} symbols x {args.bars} bars")
+    start = time.perf_counter()
+    serial = backtest.run(series, grid, processes=1)
+    serial_s = time.perf_counter() - start
+    start = time.perf_counter()
+    pooled = backtest.run(series, grid, processes=args.processes)
+    pooled_s = time.perf_counter() - start
+    print(f"one process {serial_s:.2f}s, {args.processes} processes {pooled_s:.2f}s")
+    check("the pool gives the same totals", all(np.allclose(serial[key], pooled[key]) for key in serial))
+    rows = backtest.report(pooled, grid)
+    check(f"{len(rows)} report rows", len(rows) == sum(len(c) * len(backtest.SIGNALS[f]) for f, c in grid.items()) * len(backtest.HORIZONS))
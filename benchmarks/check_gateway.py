@@ -0,0 +1,151 @@
+# Exercises the fetch gateway against a local fake HTTP server: retries on
+# transient statuses, no retries on client errors, coalescing of identical
+# concurrent requests and the token-bucket rate limit. Then runs batched
+# downloads through market_data with yfinance's per-symbol fetch faked:
+# throttled symbols are retried, and large batches pay the rate limit in full.
+#
+#   python benchmarks/check_gateway.py
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import yfinance.multi
+from yfinance.exceptions import YFRateLimitError
+
+import market_data
+from gateway import FetchGateway
+
+
+class FakeTicker:
+    # Stands in for the Ticker yf.download uses per symbol; the symbols in
+    # `throttled` are rate limited the first time they are asked for
+    throttled = set()
+    requests = []
+    lock = threading.Lock()
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self._price_history = None
+
+    def history(self, **kwargs):
+        with self.lock:
+            self.requests.append(self.symbol)
+            if self.symbol in self.throttled:
+                self.throttled.discard(self.symbol)
+                raise YFRateLimitError()
+        index = pd.date_range("2024-01-02", periods=3, freq="D", tz="America/New_York")
+        return pd.DataFrame({column: [1.0, 2.0, 3.0] for column in ["Open", "High", "Low", "Close", "Volume"]}, index=index)
+
+
+class FakeYahoo(BaseHTTPRequestHandler):
+    hits = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        with self.lock:
+            count = self.hits[path] = self.hits.get(path, 0) + 1
+        if path == "/flaky" and count <= 2:
+            status = 503
+        elif path == "/throttled" and count <= 1:
+            status = 429
+        elif path == "/missing":
+            status = 404
+        else:
+            status = 200
+        if path == "/slow":
+            time.sleep(0.3)
+        body = f'{{"path": "{path}", "hit": {count}}}'.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeYahoo)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    gateway = FetchGateway(rate=1000, burst=1000, backoff=0.05)
+    response = gateway.get(f"{base}/flaky")
+    check("503 is retried until it succeeds", response.status_code == 200 and FakeYahoo.hits["/flaky"] == 3)
+    gateway.get(f"{base}/throttled")
+    check("429 is retried", FakeYahoo.hits["/throttled"] == 2)
+    try:
+        gateway.get(f"{base}/missing")
+        failed = False
+    except Exception:
+        failed = True
+    check("404 fails without retrying", failed and FakeYahoo.hits["/missing"] == 1)
+
+    # A port nobody listens on: the default (curl_cffi) session reports the
+    # refused connection with a status 0 response, which must still retry
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    closed_port = probe.getsockname()[1]
+    probe.close()
+    refused = FetchGateway(rate=1000, burst=1000, retries=2, backoff=0.01)
+    try:
+        refused.get(f"http://127.0.0.1:{closed_port}/", timeout=2)
+    except Exception:
+        pass
+    check("a refused connection is retried", refused.stats["retries"] == 2 and refused.stats["failures"] == 1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda _: gateway.get(f"{base}/slow"), range(8)))
+    check("8 concurrent identical requests make 1 server hit", FakeYahoo.hits["/slow"] == 1)
+    check("all 8 callers get the response", all(r.json()["hit"] == 1 for r in responses))
+
+    limited = FetchGateway(rate=20, burst=5)
+    start = time.perf_counter()
+    for i in range(25):
+        limited.get(f"{base}/ok", params={"i": i})
+    elapsed = time.perf_counter() - start
+    # 5 go out at once, the other 20 at 20 per second
+    check(f"rate limit holds 25 requests to ~1s ({elapsed:.2f}s)", elapsed >= 0.9)
+
+    try:
+        limited.bucket.acquire(6)
+        rejected = False
+    except ValueError:
+        rejected = True
+    check("a cost above the bucket capacity is refused, not capped", rejected)
+
+    yfinance.multi.Ticker = FakeTicker
+    market_data._gateway = FetchGateway(rate=1000, burst=10, backoff=0.05)
+    FakeTicker.throttled = {"B"}
+    frames = market_data.download_many(["A", "B", "C"], "5d", "1d")
+    check(
+        "a throttled symbol in a batch is retried instead of coming back empty",
+        all(len(frames[symbol]) == 3 for symbol in "ABC") and FakeTicker.requests.count("B") == 2,
+    )
+    check("the retry went through the gateway's backoff", market_data._gateway.stats["retries"] == 1)
+
+    market_data._gateway = FetchGateway(rate=50, burst=10)
+    symbols = [f"S{i:03d}" for i in range(100)]
+    start = time.perf_counter()
+    frames = market_data.download_many(symbols, "5d", "1d")
+    elapsed = time.perf_counter() - start
+    # 10 go out at once, the other 90 at 50 per second
+    check(f"a 100 symbol batch is charged 100 tokens ({elapsed:.2f}s)", elapsed >= 1.7 and len(frames) == 100)
+
+    print(gateway.stats)
+    server.shutdown()
@@ -0,0 +1,150 @@
+# Drives live mode offline: LiveScheduler polls a ReplaySource on the worker
+# pool and merges the bars into real ChartControllers, routed the way
+# live_bars_arrived does. Checks that the polled bars rebuild the recorded
+# series, that a poll which returns after the chart switched interval is
+# dropped, and that failed polls back off and recover.
+#
+#   python benchmarks/check_live.py
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from PyQt5.QtChart import QChartView
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtWidgets import QApplication
+
+from bars import BarSeries
+from bench_indicators import fixture
+from charts import ChartController
+from live import LiveScheduler, ReplaySource
+from workers import WorkerPool
+
+BARS = 60
+START = 10
+POLL = 0.01
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        raise SystemExit(1)
+
+
+def recorded(seed, minutes):
+    frame = fixture(BARS, seed)
+    frame["Open"] = frame["Close"]
+    frame["Volume"] = np.arange(BARS) * 100
+    frame.index = pd.date_range("2024-03-04 14:30", periods=BARS, freq=f"{minutes}min", tz="UTC")
+    return BarSeries.from_frame(frame)
+
+
+def wait(app, seconds, until=None):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline and not (until and until()):
+        app.processEvents(QEventLoop.AllEvents, 5)
+        time.sleep(0.001)
+
+
+class Screen:
+    # The charts on screen as (symbol, interval, chart), routed the way
+    # StockApp.live_bars_arrived does
+    def __init__(self):
+        self.charts = []
+        self.arrived = []
+
+    def show(self, symbol, interval, bars):
+        chart = ChartController(QChartView())
+        chart.set_data(bars, symbol, "hh:mm")
+        self.charts = [(symbol, interval, chart)]
+        return chart
+
+    def targets(self):
+        return [(symbol, interval, chart.last_timestamp()) for symbol, interval, chart in self.charts]
+
+    def on_bars(self, symbol, interval, bars):
+        self.arrived.append((symbol, interval, len(bars)))
+        for chart_symbol, chart_interval, chart in self.charts:
+            if chart_symbol == symbol and chart_interval == interval:
+                chart.append_data(bars)
+
+
+class GatedSource:
+    # Holds each fetch until released, so a poll can be caught in flight
+    def __init__(self, source):
+        self.source = source
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def fetch(self, symbol, interval, since_ms):
+        self.started.set()
+        self.release.wait(5)
+        return self.source.fetch(symbol, interval, since_ms)
+
+
+class FlakySource:
+    # Fails the first `failures` fetches
+    def __init__(self, source, failures):
+        self.source = source
+        self.failures = failures
+
+    def fetch(self, symbol, interval, since_ms):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("offline")
+        return self.source.fetch(symbol, interval, since_ms)
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv[:1])
+    workers = WorkerPool(max_threads=2)
+    five = recorded(0, 5)
+    fifteen = recorded(1, 15)
+
+    # Replaying the rest of the session a few bars per poll rebuilds it
+    screen = Screen()
+    chart = screen.show("AAPL", "5m", five[:START])
+    scheduler = LiveScheduler(workers, ReplaySource({"AAPL": five}, start=START, step=3), screen.targets, screen.on_bars, interval=POLL, jitter=0)
+    scheduler.start()
+    wait(app, 10, until=lambda: len(chart.x) == BARS)
+    scheduler.stop()
+    check(f"{len(screen.arrived)} polls rebuild all {BARS} bars", np.array_equal(chart.x, five.ts))
+    check("the merged closes match the recording", np.allclose(chart.y, five.close))
+    check("every poll is at most one step plus the re-sent last bar", all(count <= 4 for _, _, count in screen.arrived))
+
+    # A 5m poll still in flight when the chart switches to 15m is dropped
+    screen = Screen()
+    screen.show("AAPL", "5m", five[:START])
+    gate = GatedSource(ReplaySource({"AAPL": five}, start=START, step=3))
+    scheduler = LiveScheduler(workers, gate, screen.targets, screen.on_bars, interval=60, jitter=0)
+    scheduler.start()
+    check("the 5m poll is in flight", gate.started.wait(5))
+    chart = screen.show("AAPL", "15m", fifteen[:START])
+    gate.release.set()
+    wait(app, 5, until=lambda: screen.arrived)
+    check("the stale poll reports the interval it was made for", screen.arrived == [("AAPL", "5m", 4)])
+    check("the 15m chart keeps its own bars", np.array_equal(chart.x, fifteen.ts[:START]))
+    check("the next poll is for the 15m chart", screen.targets() == [("AAPL", "15m", int(fifteen.ts[START - 1]))])
+    scheduler.stop()
+
+    # Failed polls back off, and the first good one resets the delay
+    screen = Screen()
+    chart = screen.show("AAPL", "5m", five[:START])
+    source = FlakySource(ReplaySource({"AAPL": five}, start=START, step=1), failures=2)
+    scheduler = LiveScheduler(workers, source, screen.targets, screen.on_bars, interval=POLL, jitter=0)
+    scheduler.start()
+    wait(app, 5, until=lambda: scheduler.failures == 2)
+    check("two failures double the delay twice", scheduler.timer.interval() == int(POLL * 4 * 1000))
+    wait(app, 5, until=lambda: screen.arrived)
+    check("the next good poll resets the backoff", scheduler.failures == 0 and len(chart.x) == START + 1)
+    scheduler.stop()
+    check("stop() cancels the next poll", not scheduler.is_active())
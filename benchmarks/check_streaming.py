@@ -0,0 +1,140 @@
+# Streams ticks from a local tick server into TickStream, headless, and
+# checks that the 5 minute bars built from them match the ticks sent, that
+# a burst is folded into a few GUI updates without stalling the event loop,
+# and that the stream reconnects when the server goes away.
+#
+#   python benchmarks/check_streaming.py
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from streaming import BAR_MS, TickStream
+from tick_server import TickServer
+
+SYMBOLS = ["AAPL", "MSFT", "^GSPC"]
+BURST = 5000
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        raise SystemExit(1)
+
+
+def expected_bars(ticks, seed):
+    # What the stream should have built: the seeded bar, then one bar per
+    # 5 minutes of ticks, volume from the change in the day's running total
+    bars = {seed[0]: [seed[0], seed[1], seed[1], seed[1], seed[1], seed[2]]}
+    previous = None
+    for _, ts, price, day_volume, _, _ in ticks:
+        start = ts - ts % BAR_MS
+        volume = day_volume - previous if previous is not None else 0
+        previous = day_volume
+        bar = bars.get(start)
+        if bar is None:
+            bars[start] = [start, price, price, price, price, volume]
+        else:
+            bar[2], bar[3], bar[4] = max(bar[2], price), min(bar[3], price), price
+            bar[5] += volume
+    return np.array([bars[start] for start in sorted(bars)], dtype=np.float64)
+
+
+class Received:
+    # Merges updates the way ChartController.append_data does
+    def __init__(self):
+        self.bars = {}
+        self.updates = 0
+        self.quotes = {}
+
+    def __call__(self, symbol, bars, quote):
+        self.updates += 1
+        self.quotes[symbol] = quote
+        rows = np.column_stack([bars.ts, bars.open, bars.high, bars.low, bars.close, bars.volume]).astype(np.float64)
+        old = self.bars.get(symbol, np.empty((0, 6)))
+        self.bars[symbol] = np.vstack([old[old[:, 0] < rows[0, 0]], rows])
+
+
+def wait(app, seconds, until=None):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline and not (until and until()):
+        app.processEvents(QEventLoop.AllEvents, 5)
+        time.sleep(0.001)
+
+
+if __name__ == "__main__":
+    app = QCoreApplication(sys.argv[:1])
+
+    # The server runs on its own asyncio loop, as it would in its own process
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    server = TickServer(speed=3000, ticks_per_bar=50, burst=BURST)
+    listener = asyncio.run_coroutine_threadsafe(server.serve(port=0), loop).result()
+    port = listener.sockets[0].getsockname()[1]
+
+    # The GUI loop should keep ticking every 10 ms throughout
+    gaps = []
+    last = [time.perf_counter()]
+
+    def heartbeat():
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+
+    timer = QTimer()
+    timer.timeout.connect(heartbeat)
+    timer.start(10)
+
+    received = Received()
+    stream = TickStream(received, url=f"ws://127.0.0.1:{port}")
+    seeds = {symbol: (server.start_ms, 100.0, 1000) for symbol in SYMBOLS}
+    started = time.perf_counter()
+    stream.watch(seeds)
+    wait(app, 3)
+    # Unsubscribe and let the ticks already on the wire arrive
+    stream.watch({})
+    wait(app, 5, until=lambda: stream.builder.ticks == len(server.sent) and not stream.flush_timer.isActive())
+    wait(app, 0.3)
+    elapsed = time.perf_counter() - started
+
+    sent = {symbol: [tick for tick in server.sent if tick[0] == symbol] for symbol in SYMBOLS}
+    total = sum(len(ticks) for ticks in sent.values())
+    check(f"{total} ticks received", stream.builder.ticks == total and total > len(SYMBOLS) * BURST)
+    for symbol in SYMBOLS:
+        expected = expected_bars(sent[symbol], seeds[symbol])
+        got = received.bars[symbol]
+        same = got.shape == expected.shape and np.allclose(got, expected, rtol=1e-6)
+        check(f"{symbol}: {len(got)} bars match the ticks sent", same)
+        last_tick = sent[symbol][-1]
+        check(f"{symbol}: latest quote is the last tick", received.quotes[symbol][0] == last_tick[1])
+    check(
+        f"{total} ticks folded into {received.updates} GUI updates over {elapsed:.1f}s",
+        received.updates <= len(SYMBOLS) * (elapsed * 1000 / 250 + 2),
+    )
+    worst = max(gaps) * 1000
+    check(f"GUI loop never stalled (longest gap {worst:.0f} ms)", worst < 100)
+
+    # Drop the server and bring it back on the same port
+    stream.watch({"AAPL": seeds["AAPL"]})
+    wait(app, 0.5)
+    before = stream.stats["reconnects"]
+    loop.call_soon_threadsafe(listener.close)
+    asyncio.run_coroutine_threadsafe(listener.wait_closed(), loop).result()
+    server.sent.clear()
+    asyncio.run_coroutine_threadsafe(server.serve(port=port), loop).result()
+    wait(app, 10, until=lambda: server.sent)
+    check("the stream reconnects and resubscribes", stream.stats["reconnects"] > before and len(server.sent) > 0)
+
+    stream.stop()
+    check("stop() ends the stream thread", not stream.is_active())
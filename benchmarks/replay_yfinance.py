@@ -0,0 +1,268 @@
+# Record/replay stand-in for the parts of yfinance the app uses: download(),
+# Ticker.history(), Ticker.info and Ticker.get_analyst_price_targets().
+#
+# Recording wraps the real yfinance and saves every answer under a fixtures
+# folder; replaying serves those answers without touching the network. Calls
+# that were never recorded are answered with deterministic synthetic data,
+# so the benchmarks also run from an empty fixtures folder.
+import json
+import os
+import threading
+import time
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import analysis
+
+# Synthetic data ends on this session so every run sees the same bars
+END = pd.Timestamp("2026-10-16")
+TIMEZONE = "America/New_York"
+
+# Trading sessions covered by each period, and the most kept per interval
+PERIOD_SESSIONS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260, "10y": 2520, "max": 10000}
+MAX_SESSIONS = {"5m": 60, "1h": 504, "1d": 10000}
+# Minutes after 09:30 at which each intraday bar starts
+BAR_MINUTES = {"5m": np.arange(0, 390, 5), "1h": np.arange(0, 390, 60)}
+
+_real_ticker = yf.Ticker
+_real_download = yf.download
+
+
+def seed(*parts):
+    return zlib.crc32("|".join(map(str, parts)).encode())
+
+
+@lru_cache(maxsize=None)
+def synthetic_series(symbol, interval):
+    # The full history for one symbol and interval, always the same bars.
+    # Cached so generating it isn't timed as part of the app.
+    sessions = pd.bdate_range(end=END, periods=MAX_SESSIONS.get(interval, 10000))
+    if interval in BAR_MINUTES:
+        opens = sessions + pd.Timedelta(hours=9, minutes=30)
+        minutes = pd.to_timedelta(BAR_MINUTES[interval], unit="m")
+        index = pd.DatetimeIndex((opens.values[:, None] + minutes.values[None, :]).ravel())
+    else:
+        index = sessions
+    index = index.tz_localize(TIMEZONE)
+
+    rng = np.random.default_rng(seed(symbol, interval))
+    close = 50 + rng.uniform(0, 450) * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+    spread = close * rng.uniform(0, 0.01, len(index))
+    frame = pd.DataFrame({
+        "Open": close + rng.normal(0, 1, len(index)) * spread,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(10_000, 5_000_000, len(index)),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    }, index=index)
+    frame.index.name = "Datetime" if interval in BAR_MINUTES else "Date"
+    return frame
+
+
+def synthetic_history(symbol, period=None, interval="1d", start=None):
+    frame = synthetic_series(symbol, interval)
+    if start is not None:
+        return frame[frame.index >= pd.Timestamp(start)]
+    sessions = frame.index.normalize().unique()[-PERIOD_SESSIONS.get(period, 21):]
+    return frame[frame.index.normalize() >= sessions[0]]
+
+
+def synthetic_info(symbol):
+    sector, industry = "Technology", "Software"
+    for sector_name, industries in analysis.SECTOR_COMPETITORS.items():
+        for industry_name, symbols in industries.items():
+            if symbol in symbols:
+                sector, industry = sector_name, industry_name
+    rng = np.random.default_rng(seed(symbol, "info"))
+    price = float(synthetic_series(symbol, "1d")["Close"].iloc[-1])
+    return {
+        "symbol": symbol,
+        "quoteType": "EQUITY",
+        "sector": sector,
+        "industry": industry,
+        "marketCap": int(rng.integers(10**9, 3 * 10**12)),
+        "trailingPE": float(rng.uniform(5, 60)),
+        "trailingEps": float(rng.uniform(0.5, 20)),
+        "forwardPE": float(rng.uniform(5, 50)),
+        "dividendYield": float(rng.uniform(0, 0.04)),
+        "fiftyTwoWeekHigh": price * 1.2,
+        "fiftyTwoWeekLow": price * 0.8,
+        "regularMarketPrice": price,
+    }
+
+
+def synthetic_price_targets(symbol):
+    price = float(synthetic_series(symbol, "1d")["Close"].iloc[-1])
+    return {"current": price, "low": price * 0.8, "high": price * 1.3, "mean": price * 1.1, "median": price * 1.08}
+
+
+class Fixtures:
+    # One file per recorded answer plus an index mapping call keys to files
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.index = {}
+        try:
+            with open(os.path.join(path, "index.json")) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def __len__(self):
+        return len(self.index)
+
+    def load(self, key):
+        name = self.index.get(key)
+        if name is None:
+            return None
+        file_path = os.path.join(self.path, name)
+        if name.endswith(".pkl"):
+            return pd.read_pickle(file_path)
+        with open(file_path) as f:
+            return json.load(f)
+
+    def save(self, key, value):
+        os.makedirs(self.path, exist_ok=True)
+        digest = f"{zlib.crc32(key.encode()):08x}"
+        if isinstance(value, pd.DataFrame):
+            name = f"{digest}.pkl"
+            value.to_pickle(os.path.join(self.path, name))
+        else:
+            name = f"{digest}.json"
+            with open(os.path.join(self.path, name), "w") as f:
+                json.dump(value, f, default=str)
+        with self._lock:
+            self.index[key] = name
+            with open(os.path.join(self.path, "index.json"), "w") as f:
+                json.dump(self.index, f, indent=1, sort_keys=True)
+
+
+def history_key(symbol, period=None, interval="1d", start=None):
+    return f"history|{symbol}|{period}|{interval}|{start}"
+
+
+class FakeYahoo:
+    # mode is "replay" or "record"; latency (seconds) is added to every call
+    # to stand in for the network round trip
+    def __init__(self, fixtures_path, mode="replay", latency=0.0):
+        self.fixtures = Fixtures(fixtures_path)
+        self.mode = mode
+        self.latency = latency
+        self.calls = {"download": 0, "history": 0, "info": 0, "price_targets": 0}
+        self._lock = threading.Lock()
+
+    def _call(self, kind, key, real, synthetic):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.mode == "record":
+            value = real()
+            self.fixtures.save(key, value)
+            return value
+        value = self.fixtures.load(key)
+        return synthetic() if value is None else value
+
+    def history(self, symbol, period=None, interval="1d", start=None, **kwargs):
+        def unrecorded():
+            # Incremental requests start wherever the store left off, so
+            # they are cut from a recorded full history when there is one
+            if start is not None:
+                for key in list(self.fixtures.index):
+                    if key.startswith(f"history|{symbol}|") and key.endswith(f"|{interval}|None"):
+                        recorded = self.fixtures.load(key)
+                        return recorded[recorded.index >= pd.Timestamp(start)]
+            return synthetic_history(symbol, period, interval, start)
+
+        return self._call(
+            "history", history_key(symbol, period, interval, start),
+            lambda: _real_ticker(symbol).history(period=period, interval=interval, start=start, **kwargs),
+            unrecorded,
+        )
+
+    def info(self, symbol):
+        return self._call(
+            "info", f"info|{symbol}",
+            lambda: _real_ticker(symbol).info,
+            lambda: synthetic_info(symbol),
+        )
+
+    def price_targets(self, symbol):
+        return self._call(
+            "price_targets", f"price_targets|{symbol}",
+            lambda: _real_ticker(symbol).get_analyst_price_targets(),
+            lambda: synthetic_price_targets(symbol),
+        )
+
+    def download(self, tickers, period="1mo", interval="1d", start=None, **kwargs):
+        if isinstance(tickers, str):
+            tickers = tickers.split()
+        with self._lock:
+            self.calls["download"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        # Recorded per symbol, since which symbols are batched together
+        # depends on what was already cached
+        frames = {}
+        if self.mode == "record":
+            data = _real_download(list(tickers), period=period, interval=interval, start=start, **kwargs)
+            for symbol in tickers:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if symbol not in data.columns.get_level_values(0):
+                        continue
+                    frame = data[symbol]
+                else:
+                    frame = data
+                frames[symbol] = frame
+                # Incremental answers depend on what was stored, so aren't kept
+                if start is None:
+                    self.fixtures.save(f"download|{symbol}|{period}|{interval}", frame)
+        else:
+            for symbol in tickers:
+                frame = self._replay_download(symbol, period, interval, start)
+                frames[symbol] = frame
+        return pd.concat(frames, axis=1)
+
+    def _replay_download(self, symbol, period, interval, start):
+        if start is None:
+            frame = self.fixtures.load(f"download|{symbol}|{period}|{interval}")
+            if frame is not None:
+                return frame
+        else:
+            # Cut from a recorded download of the symbol, as history() does
+            for key in list(self.fixtures.index):
+                if key.startswith(f"download|{symbol}|") and key.endswith(f"|{interval}"):
+                    recorded = self.fixtures.load(key)
+                    return recorded[recorded.index >= pd.Timestamp(start)]
+        return synthetic_history(symbol, period, interval, start).drop(columns=["Dividends", "Stock Splits"])
+
+    def install(self):
+        fake = self
+
+        class Ticker:
+            def __init__(self, symbol, session=None):
+                self.ticker = symbol
+
+            def history(self, **kwargs):
+                return fake.history(self.ticker, **kwargs)
+
+            @property
+            def info(self):
+                return fake.info(self.ticker)
+
+            def get_analyst_price_targets(self):
+                return fake.price_targets(self.ticker)
+
+        yf.Ticker = Ticker
+        yf.download = self.download
+        return self
+
+    def uninstall(self):
+        yf.Ticker = _real_ticker
+        yf.download = _real_download
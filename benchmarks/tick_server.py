@@ -0,0 +1,137 @@
+# Local stand-in for Yahoo's quote streamer: a WebSocket server that takes
+# the same {"subscribe": [...]} / {"unsubscribe": [...]} messages and sends
+# the same base64 protobuf price ticks, replayed from recorded (or
+# synthetic) 5 minute bars, see replay_yfinance.py.
+#
+#   python benchmarks/tick_server.py --speed 60
+#   STOCKSNAPSHOT_STREAM_URL=ws://127.0.0.1:8765 python main.py
+#
+# Market time starts at the current 5 minute bar and runs `speed` times
+# faster than the wall clock. --burst sends that many ticks per symbol at
+# once when a symbol is subscribed, to check that the app keeps up.
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import websockets
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from replay_yfinance import FakeYahoo, seed
+from streaming import BAR_MS, encode_tick
+
+
+class TickSource:
+    # Ticks for one symbol: every replayed bar becomes `ticks_per_bar` ticks
+    # that open at its open, touch its high and low and end at its close
+    def __init__(self, symbol, frame, start_ms, ticks_per_bar):
+        self.symbol = symbol
+        self.bars = frame[["Open", "High", "Low", "Close", "Volume"]].to_numpy(dtype=np.float64)
+        self.start_ms = start_ms
+        self.ticks_per_bar = ticks_per_bar
+        self.rng = np.random.default_rng(seed(symbol, "ticks"))
+        self.position = 0
+        self.day_volume = 0
+        self.day_high = 0.0
+        self.day_low = float("inf")
+        self.prices = self.sizes = None
+
+    def _bar(self, index):
+        open_, high, low, close, volume = self.bars[index % len(self.bars)]
+        count = self.ticks_per_bar
+        prices = self.rng.uniform(low, high, count)
+        prices[0], prices[-1] = open_, close
+        if count > 3:
+            prices[1], prices[2] = high, low
+        sizes = self.rng.multinomial(int(volume), np.full(count, 1 / count))
+        return prices, sizes
+
+    def next_tick(self):
+        bar, step = divmod(self.position, self.ticks_per_bar)
+        if step == 0:
+            self.prices, self.sizes = self._bar(bar)
+        self.position += 1
+        price = float(self.prices[step])
+        self.day_volume += int(self.sizes[step])
+        self.day_high = max(self.day_high, price)
+        self.day_low = min(self.day_low, price)
+        ts = self.start_ms + bar * BAR_MS + step * BAR_MS // self.ticks_per_bar
+        return self.symbol, ts, price, self.day_volume, self.day_high, self.day_low
+
+
+class TickServer:
+    def __init__(self, fixtures=os.path.join(HERE, "fixtures"), speed=60, ticks_per_bar=50, burst=0, start_ms=None):
+        self.yahoo = FakeYahoo(fixtures)
+        self.speed = speed
+        self.ticks_per_bar = ticks_per_bar
+        self.burst = burst
+        now = int(time.time() * 1000)
+        self.start_ms = start_ms if start_ms is not None else now - now % BAR_MS
+        # Every tick sent, for checks
+        self.sent = []
+        self.connections = 0
+
+    def source(self, symbol):
+        frame = self.yahoo.history(symbol, period="5d", interval="5m")
+        return TickSource(symbol, frame, self.start_ms, self.ticks_per_bar)
+
+    async def handler(self, ws):
+        self.connections += 1
+        sources = {}
+        sender = asyncio.create_task(self._send_ticks(ws, sources))
+        try:
+            async for message in ws:
+                request = json.loads(message)
+                for symbol in request.get("subscribe", []):
+                    if symbol not in sources:
+                        sources[symbol] = self.source(symbol)
+                        for _ in range(self.burst):
+                            await self._send(ws, sources[symbol].next_tick())
+                for symbol in request.get("unsubscribe", []):
+                    sources.pop(symbol, None)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+
+    async def _send(self, ws, tick):
+        self.sent.append(tick)
+        await ws.send(encode_tick(*tick))
+
+    async def _send_ticks(self, ws, sources):
+        # One tick per symbol every tick's worth of market time
+        gap = BAR_MS / self.ticks_per_bar / 1000 / self.speed
+        while True:
+            for source in list(sources.values()):
+                await self._send(ws, source.next_tick())
+            await asyncio.sleep(gap)
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        return await websockets.serve(self.handler, host, port)
+
+
+async def main(args):
+    server = TickServer(args.fixtures, args.speed, args.ticks_per_bar, args.burst)
+    await server.serve(args.host, args.port)
+    print(f"Streaming ticks on ws://{args.host}:{args.port} at {args.speed}x")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded bars as a live tick stream.")
+    parser.add_argument("--fixtures", default=os.path.join(HERE, "fixtures"), help="recorded market data folder")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=60, help="market time per wall-clock second (default: 60)")
+    parser.add_argument("--ticks-per-bar", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=0, help="ticks sent at once per newly subscribed symbol")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    # Thread-safe LRU cache where every entry carries its own expiry time.
+    # get_or_fetch() also makes sure only one thread fetches a given key at a
+    # time, so parallel workers asking for the same data share one request.
+    def __init__(self, name, max_size=128, ttl=None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, key, fetch, ttl=None, cacheable=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have filled the entry while we waited
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+            try:
+                value = fetch()
+                if cacheable is None or cacheable(value):
+                    self.set(key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
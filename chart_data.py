@@ -0,0 +1,111 @@
+import numpy as np
+
+
+def line_arrays(bars, field="close"):
+    # Epoch-millisecond x values and float y values for one field of a
+    # BarSeries, widened to float64 for plotting. Bars with a missing value
+    # are dropped.
+    x, y, _ = chart_arrays(bars, field)
+    return x, y
+
+
+def chart_arrays(bars, field="close"):
+    # Like line_arrays(), plus the volume of the same bars
+    x = bars.ts.astype(np.float64)
+    y = getattr(bars, field).astype(np.float64)
+    volume = bars.volume.astype(np.float64)
+    mask = ~np.isnan(y)
+    return x[mask], y[mask], volume[mask]
+
+
+def percent_change_panel(series):
+    # Aligns several BarSeries on the union of their timestamps and expresses
+    # each close as percent change from its first bar. Alignment is a
+    # vectorized reindex with forward fill: searchsorted finds, for every
+    # common timestamp, the last bar at or before it. Timestamps before a
+    # symbol's first bar stay NaN. Returns x (float64 ms) and a
+    # (symbols x timestamps) float64 array.
+    closes = []
+    stamps = []
+    for bars in series:
+        close = bars.close.astype(np.float64)
+        keep = ~np.isnan(close)
+        closes.append(close[keep])
+        stamps.append(bars.ts[keep])
+    if not stamps:
+        return np.empty(0), np.empty((0, 0))
+    x = np.unique(np.concatenate(stamps))
+    panel = np.full((len(closes), len(x)), np.nan)
+    for row, (ts, close) in enumerate(zip(stamps, closes)):
+        if not len(ts):
+            continue
+        position = np.searchsorted(ts, x, side="right") - 1
+        valid = position >= 0
+        panel[row, valid] = (close[position[valid]] / close[0] - 1) * 100
+    return x.astype(np.float64), panel
+
+
+# Bars more than an hour apart belong to different sessions
+SESSION_GAP_MS = 60 * 60 * 1000
+
+
+def session_quote(bars, points=40):
+    # (last, change % from the previous session's close or None, sparkline
+    # of the latest session as a tuple of at most `points` closes), or None
+    close = bars.close.astype(np.float64)
+    valid = ~np.isnan(close)
+    ts, close = bars.ts[valid], close[valid]
+    if not len(close):
+        return None
+    breaks = np.flatnonzero(np.diff(ts) > SESSION_GAP_MS)
+    start = int(breaks[-1]) + 1 if len(breaks) else 0
+    last = float(close[-1])
+    change = float((last / close[start - 1] - 1) * 100) if start else None
+    spark = close[start:]
+    if len(spark) > points:
+        # Evenly spaced closes; at sparkline size LTTB isn't worth its cost
+        spark = spark[np.linspace(0, len(spark) - 1, points).astype(np.int64)]
+    return last, change, tuple(spark.tolist())
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the first and last point and, for
+    # each bucket in between, the point forming the largest triangle with the
+    # previously kept point and the average of the next bucket. The loop runs
+    # once per output point, so cost is bounded by the threshold.
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    # Average of every bucket, used as the third triangle corner
+    counts = np.diff(np.append(edges, n))
+    avg_x = np.add.reduceat(x, edges) / counts
+    avg_y = np.add.reduceat(y, edges) / counts
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return x[kept], y[kept]
+
+
+def bucket_sum(values, buckets):
+    # Sums consecutive values into at most `buckets` groups
+    n = len(values)
+    if buckets >= n or buckets < 1:
+        return values
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+    return np.add.reduceat(values, edges)
+
+
+def volume_array(bars):
+    return chart_arrays(bars)[2]
@@ -0,0 +1,283 @@
+import os
+
+import numpy as np
+from PyQt5.QtChart import QBarSeries, QBarSet, QChart, QChartView, QDateTimeAxis, QLineSeries, QValueAxis
+from PyQt5.QtCore import QDateTime, QEvent, QObject, QPointF, Qt, QTimer
+from PyQt5.QtGui import QColor
+
+import tracing
+from chart_data import bucket_sum, chart_arrays, lttb
+
+# Plotted points per pixel of chart width, and pixels per volume bar
+POINTS_PER_PIXEL = 1
+PIXELS_PER_BAR = 3
+# Comparison lines are drawn with OpenGL unless STOCKSNAPSHOT_OPENGL=0
+USE_OPENGL = os.environ.get("STOCKSNAPSHOT_OPENGL", "1") != "0"
+
+
+def to_points(x, y):
+    return list(map(QPointF, x.tolist(), y.tolist()))
+
+
+def set_line_data(series, x, y):
+    # One replace() call instead of an append() per point
+    series.replace(to_points(x, y))
+
+
+def set_bar_data(bar_set, values):
+    if bar_set.count():
+        bar_set.remove(0, bar_set.count())
+    bar_set.append(values.tolist())
+
+
+class RangeController(QObject):
+    # Owns one persistent QChart per view with a date/time x axis and a value
+    # y axis. The full-resolution data is kept and only the visible range is
+    # plotted, downsampled to the view's pixel width; zooming with the rubber
+    # band or resizing the view re-resolves detail for that range. Subclasses
+    # keep their timestamps in self.x and draw bars lo:hi in _draw().
+    def __init__(self, chart_view):
+        super().__init__(chart_view)
+        self.chart_view = chart_view
+        self.chart = QChart()
+        self.x = np.empty(0)
+        self._updating = False
+
+        self.axis_x = QDateTimeAxis()
+        self.axis_x.setTickCount(5)
+        self.chart.addAxis(self.axis_x, Qt.AlignBottom)
+        self.axis_y = QValueAxis()
+        self.chart.addAxis(self.axis_y, Qt.AlignLeft)
+
+        chart_view.setChart(self.chart)
+        chart_view.setRubberBand(QChartView.HorizontalRubberBand)
+
+        # Re-resolve detail when the visible range or the view width changes
+        self.axis_x.rangeChanged.connect(self._on_range_changed)
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(50)
+        self._resize_timer.timeout.connect(self._render_visible)
+        chart_view.installEventFilter(self)
+
+    def max_points(self):
+        return max(100, self.chart_view.width() * POINTS_PER_PIXEL)
+
+    def eventFilter(self, obj, event):
+        if obj is self.chart_view and event.type() == QEvent.Resize:
+            self._resize_timer.start()
+        return False
+
+    def _on_range_changed(self, min_dt, max_dt):
+        if not self._updating:
+            self._render(min_dt.toMSecsSinceEpoch(), max_dt.toMSecsSinceEpoch())
+
+    def _render_visible(self):
+        if len(self.x):
+            self._render(self.axis_x.min().toMSecsSinceEpoch(), self.axis_x.max().toMSecsSinceEpoch())
+
+    def _render(self, start_ms, end_ms, set_x_range=False):
+        # Include one bar either side so the lines run to the plot edges
+        lo = max(int(np.searchsorted(self.x, start_ms, side="left")) - 1, 0)
+        hi = min(int(np.searchsorted(self.x, end_ms, side="right")) + 1, len(self.x))
+        if hi <= lo:
+            return
+        self._updating = True
+        try:
+            self._draw(lo, hi)
+            if set_x_range:
+                self.axis_x.setRange(QDateTime.fromMSecsSinceEpoch(int(self.x[lo])), QDateTime.fromMSecsSinceEpoch(int(self.x[hi - 1])))
+        finally:
+            self._updating = False
+
+    def _draw(self, lo, hi):
+        raise NotImplementedError
+
+
+class ChartController(RangeController):
+    # Price line (LTTB-downsampled) with optional volume bars (summed
+    # buckets). New data is swapped into the existing series and axis ranges
+    # are updated in place, so a refresh never rebuilds the chart, its axes
+    # or its pens, and rendering cost doesn't grow with the number of bars.
+    def __init__(self, chart_view, show_volume=False, price_title=None):
+        super().__init__(chart_view)
+        self.y = self.volume = np.empty(0)
+
+        self.price_series = QLineSeries()
+        self.chart.addSeries(self.price_series)
+        self.price_series.attachAxis(self.axis_x)
+        if price_title:
+            self.axis_y.setTitleText(price_title)
+        self.price_series.attachAxis(self.axis_y)
+
+        self.volume_set = None
+        if show_volume:
+            volume_series = QBarSeries()
+            self.volume_set = QBarSet("")  # Remove the "Volume" label
+            volume_series.append(self.volume_set)
+            self.chart.addSeries(volume_series)
+            volume_series.attachAxis(self.axis_x)
+
+            # Create and set up the Y-axis for volume
+            self.axis_y_volume = QValueAxis()
+            self.axis_y_volume.setTitleText("Volume")
+            self.chart.addAxis(self.axis_y_volume, Qt.AlignRight)
+            volume_series.attachAxis(self.axis_y_volume)
+
+        # Set colors and style for price series
+        self.price_series.setColor(QColor(255, 0, 0))  # Red color
+        pen = self.price_series.pen()
+        pen.setStyle(Qt.DashLine)
+        pen.setWidth(2)
+        self.price_series.setPen(pen)
+
+        # Hide the legend
+        self.chart.legend().hide()
+
+    def set_data(self, bars, title, time_format):
+        with tracing.span("chart.set_data", "render", title=title, rows=len(bars)):
+            self.chart.setTitle(title)
+            self.axis_x.setFormat(time_format)
+            self.x, self.y, self.volume = chart_arrays(bars)
+            if len(self.x):
+                # Drop any zoom left over from the previous data
+                self.chart.zoomReset()
+                self._render(self.x[0], self.x[-1], set_x_range=True)
+            else:
+                self.price_series.clear()
+                if self.volume_set is not None:
+                    set_bar_data(self.volume_set, self.volume)
+
+    def last_timestamp(self):
+        return int(self.x[-1]) if len(self.x) else None
+
+    def append_data(self, bars):
+        # Merge newly polled bars: ones at or after the first new timestamp
+        # are replaced (the last bar may have still been forming). Returns
+        # False when nothing visible changed.
+        x, y, volume = chart_arrays(bars)
+        if not len(x):
+            return False
+        old_count = len(self.x)
+        keep = int(np.searchsorted(self.x, x[0], side="left"))
+        if (
+            keep + len(x) == old_count
+            and np.array_equal(self.x[keep:], x)
+            and np.array_equal(self.y[keep:], y)
+            and np.array_equal(self.volume[keep:], volume)
+        ):
+            return False
+
+        was_at_end = not old_count or self.axis_x.max().toMSecsSinceEpoch() >= self.x[-1]
+        raw_on_screen = old_count and self.price_series.count() == old_count
+        self.x = np.concatenate([self.x[:keep], x])
+        self.y = np.concatenate([self.y[:keep], y])
+        self.volume = np.concatenate([self.volume[:keep], volume])
+
+        if raw_on_screen and was_at_end and len(self.x) <= self.max_points():
+            # Every bar is plotted as-is, so just patch the tail of the series
+            self._updating = True
+            try:
+                self.price_series.removePoints(keep, old_count - keep)
+                self.price_series.append(to_points(x, y))
+                self.axis_x.setRange(
+                    QDateTime.fromMSecsSinceEpoch(int(self.x[0])), QDateTime.fromMSecsSinceEpoch(int(self.x[-1]))
+                )
+                self.axis_y.setRange(float(self.y.min()), float(self.y.max()))
+            finally:
+                self._updating = False
+            if self.volume_set is not None:
+                if old_count - keep:
+                    self.volume_set.remove(keep, old_count - keep)
+                self.volume_set.append(volume.tolist())
+                self.axis_y_volume.setRange(0, float(self.volume.max()) * 1.1)  # Add 10% margin
+        elif was_at_end:
+            # Keep following the newest bar at the current zoom width
+            width = self.axis_x.max().toMSecsSinceEpoch() - self.axis_x.min().toMSecsSinceEpoch()
+            end = self.x[-1]
+            self._render(max(end - width, self.x[0]), end, set_x_range=True)
+        return True
+
+    def _draw(self, lo, hi):
+        x, y = lttb(self.x[lo:hi], self.y[lo:hi], self.max_points())
+        with tracing.span("chart.render", "render", bars=hi - lo, points=len(x)):
+            set_line_data(self.price_series, x, y)
+            self.axis_y.setRange(float(y.min()), float(y.max()))
+            if self.volume_set is not None:
+                volume = bucket_sum(self.volume[lo:hi], max(1, self.chart_view.width() // PIXELS_PER_BAR))
+                set_bar_data(self.volume_set, volume)
+                self.axis_y_volume.setRange(0, float(volume.max()) * 1.1)  # Add 10% margin
+
+
+# Line colors for comparison overlays, cycled when there are more symbols
+COMPARISON_COLORS = [
+    "#d62728", "#1f77b4", "#2ca02c", "#ff7f0e", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+]
+
+
+class ComparisonController(RangeController):
+    # Overlays several symbols on one chart as percent change from the start
+    # of the period. Series are reused between refreshes and drawn with
+    # OpenGL, and like ChartController only an LTTB-downsampled copy of the
+    # visible range is plotted, so 10+ dense overlays stay responsive.
+    def __init__(self, chart_view, use_opengl=USE_OPENGL):
+        super().__init__(chart_view)
+        self.use_opengl = use_opengl
+        self.symbols = []
+        self.panel = np.empty((0, 0))
+        self.series = []
+
+        self.axis_y.setTitleText("% Change")
+        self.axis_y.setLabelFormat("%.1f%%")
+        self.chart.legend().setAlignment(Qt.AlignTop)
+
+    def _series(self, count):
+        # Grow the pool of line series as needed; extra ones are hidden
+        while len(self.series) < count:
+            series = QLineSeries()
+            series.setUseOpenGL(self.use_opengl)
+            pen = series.pen()
+            pen.setColor(QColor(COMPARISON_COLORS[len(self.series) % len(COMPARISON_COLORS)]))
+            pen.setWidth(2)
+            series.setPen(pen)
+            self.chart.addSeries(series)
+            series.attachAxis(self.axis_x)
+            series.attachAxis(self.axis_y)
+            self.series.append(series)
+        for i, series in enumerate(self.series):
+            series.setVisible(i < count)
+            if i >= count:
+                series.clear()
+        # Hidden series would still show up in the legend
+        for i, marker in enumerate(self.chart.legend().markers()):
+            marker.setVisible(i < count)
+        return self.series[:count]
+
+    def set_data(self, symbols, x, panel, title, time_format):
+        # x and panel come from chart_data.percent_change_panel()
+        with tracing.span("compare.set_data", "render", symbols=len(symbols), rows=len(x)):
+            self.chart.setTitle(title)
+            self.axis_x.setFormat(time_format)
+            self.symbols, self.x, self.panel = list(symbols), x, panel
+            for symbol, series in zip(self.symbols, self._series(len(self.symbols))):
+                series.setName(symbol)
+            if len(self.x):
+                self.chart.zoomReset()
+                self._render(self.x[0], self.x[-1], set_x_range=True)
+
+    def _draw(self, lo, hi):
+        x = self.x[lo:hi]
+        low, high = np.inf, -np.inf
+        with tracing.span("compare.render", "render", symbols=len(self.symbols), bars=hi - lo):
+            for row, series in enumerate(self.series[:len(self.symbols)]):
+                y = self.panel[row, lo:hi]
+                # Leading NaNs are timestamps before the symbol's first bar
+                valid = ~np.isnan(y)
+                px, py = lttb(x[valid], y[valid], self.max_points())
+                set_line_data(series, px, py)
+                if len(py):
+                    low, high = min(low, float(py.min())), max(high, float(py.max()))
+            if low <= high:
+                margin = max((high - low) * 0.05, 0.1)
+                self.axis_y.setRange(low - margin, high + margin)
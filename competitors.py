@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import analysis
+import market_data
+from paths import data_dir, write_atomic
+
+# Local sector/industry index used to discover peers. Entries come from each
+# symbol's info, are saved to disk and refreshed in the background, so the
+# competitor list no longer depends on the hard-coded table (which is only
+# the fallback and the seed universe).
+
+MAX_AGE = 7 * 24 * 60 * 60
+MAX_PEERS = 10
+# Peers whose data is prefetched so opening them is instant
+PREFETCH_PEERS = 5
+
+
+def default_path():
+    return os.path.join(data_dir(), "sector_index.json")
+
+
+def is_active(info):
+    # Delisted tickers come back with an (almost) empty info dict
+    price = info.get("regularMarketPrice", info.get("currentPrice"))
+    return bool(info.get("quoteType")) and price is not None
+
+
+def format_market_cap(value):
+    if not isinstance(value, (int, float)):
+        return "N/A"
+    for threshold, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M")):
+        if value >= threshold:
+            return f"${value / threshold:.2f}{suffix}"
+    return f"${value:,.0f}"
+
+
+class SectorIndex:
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self._lock = threading.Lock()
+        self.entries = {}
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def record(self, symbol, info):
+        entry = {
+            "sector": info.get("sector", ""),
+            "industry": info.get("industry", ""),
+            "marketCap": info.get("marketCap"),
+            "active": is_active(info),
+            "updated": time.time(),
+        }
+        with self._lock:
+            self.entries[symbol] = entry
+
+    def get(self, symbol):
+        with self._lock:
+            return self.entries.get(symbol)
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.entries)
+        write_atomic(self.path, data)
+
+    def stale(self, symbols, max_age=MAX_AGE):
+        now = time.time()
+        with self._lock:
+            return [
+                symbol for symbol in symbols
+                if symbol not in self.entries or now - self.entries[symbol]["updated"] > max_age
+            ]
+
+    def refresh(self, symbols, max_age=MAX_AGE, workers=8):
+        # Fetch info for entries that are missing or too old
+        stale = self.stale(symbols, max_age)
+        if not stale:
+            return 0
+
+        def fetch(symbol):
+            try:
+                self.record(symbol, market_data.get_info(symbol))
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(fetch, stale))
+        self.save()
+        return len(stale)
+
+    def peers(self, symbol, sector, industry, limit=MAX_PEERS):
+        # Same industry first, then the rest of the sector, largest first
+        with self._lock:
+            candidates = [
+                (other, entry) for other, entry in self.entries.items()
+                if other != symbol and entry["active"] and entry["sector"] == sector and sector
+            ]
+        by_size = lambda item: -(item[1]["marketCap"] or 0)
+        same_industry = sorted((c for c in candidates if c[1]["industry"] == industry), key=by_size)
+        same_sector = sorted((c for c in candidates if c[1]["industry"] != industry), key=by_size)
+        peers = [other for other, _ in same_industry + same_sector][:limit]
+        if peers:
+            return peers
+        # Fall back to the static table, minus anything known to be delisted
+        fallback = analysis.get_sector_competitors(sector, industry)
+        return [
+            other for other in fallback
+            if other != symbol and (self.get(other) or {}).get("active", True)
+        ][:limit]
+
+    def quotes(self, symbols):
+        # Last price and day change for every peer from one batched download
+        series = market_data.get_many(symbols, "5d", "1d")
+        rows = []
+        for symbol in symbols:
+            closes = series[symbol].close.astype(np.float64)
+            closes = closes[~np.isnan(closes)]
+            last = float(closes[-1]) if len(closes) else None
+            change = float(closes[-1] / closes[-2] - 1) if len(closes) > 1 else None
+            entry = self.get(symbol) or {}
+            rows.append({"symbol": symbol, "last": last, "change": change, "marketCap": entry.get("marketCap")})
+        return rows
+
+
+def prefetch_peers(symbols, chart_period):
+    # Warm everything update_stock() needs so a double-click opens instantly
+    market_data.get_many(symbols, chart_period, market_data.chart_interval(chart_period))
+    market_data.get_many(symbols, "1y", "1d")
+
+    def warm(symbol):
+        try:
+            market_data.get_info(symbol)
+            market_data.get_price_targets(symbol)
+        except Exception:
+            pass
+
+    with ThreadPoolExecutor(max_workers=len(symbols) or 1) as executor:
+        list(executor.map(warm, symbols))
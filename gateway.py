@@ -0,0 +1,189 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+# Every request to Yahoo goes through one FetchGateway: a shared keep-alive
+# session, a token-bucket rate limit, retries with exponential backoff for
+# transient errors, and identical concurrent requests coalesced into one.
+
+# Requests per second, and how many may go out back to back
+RATE_LIMIT = float(os.environ.get("STOCKSNAPSHOT_RATE_LIMIT", "5"))
+BURST = 10
+RETRIES = 4
+BACKOFF = 0.5
+MAX_BACKOFF = 8
+POOL_SIZE = 16
+
+# HTTP statuses worth retrying
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+def new_session():
+    # yfinance prefers curl_cffi (it looks like a browser to Yahoo); both
+    # session types keep connections alive between requests
+    try:
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        import requests
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    return curl_requests.Session(impersonate="chrome")
+
+
+class TransientError(Exception):
+    # Raised by fetches whose failure was reported rather than raised (such
+    # as throttled symbols in a batched download), so they are retried
+    pass
+
+
+def _transient_types():
+    types = [TransientError, ConnectionError, TimeoutError]
+    try:
+        from yfinance.exceptions import YFRateLimitError
+        types.append(YFRateLimitError)
+    except ImportError:
+        pass
+    try:
+        import requests
+        types += [requests.ConnectionError, requests.Timeout]
+    except ImportError:
+        pass
+    try:
+        from curl_cffi.requests import exceptions as curl_exceptions
+        types += [curl_exceptions.ConnectionError, curl_exceptions.Timeout]
+    except ImportError:
+        pass
+    return tuple(types)
+
+
+_TRANSIENT = None
+
+
+def is_transient(error):
+    global _TRANSIENT
+    if _TRANSIENT is None:
+        _TRANSIENT = _transient_types()
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    # curl_cffi attaches a response with status 0 to connection, DNS and
+    # timeout errors; those are judged by their type
+    if status:
+        return status in TRANSIENT_STATUS
+    return isinstance(error, _TRANSIENT)
+
+
+def is_transient_message(text):
+    # The same test for errors that only arrive as text, the repr() of the
+    # exception, as in yf.download's per-symbol error log
+    global _TRANSIENT
+    if _TRANSIENT is None:
+        _TRANSIENT = _transient_types()
+    name = text.split("(", 1)[0].strip()
+    return (
+        name in {error_type.__name__ for error_type in _TRANSIENT}
+        or name.endswith("Timeout")
+        or "Too Many Requests" in text
+    )
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        # Blocks until `cost` tokens are available. More than the capacity
+        # would never be; split the work instead.
+        if cost > self.capacity:
+            raise ValueError(f"cost {cost} exceeds the bucket capacity {self.capacity}")
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                wait = (cost - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchGateway:
+    def __init__(self, rate=RATE_LIMIT, burst=BURST, retries=RETRIES, backoff=BACKOFF, session=None):
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self._session = session
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0}
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = new_session()
+            return self._session
+
+    def call(self, key, fetch, cost=1):
+        # Run fetch() under the rate limit and retry policy. Callers asking
+        # for the same key while it runs wait for that result instead.
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._run(fetch, cost)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _run(self, fetch, cost):
+        attempt = 0
+        while True:
+            self.bucket.acquire(cost)
+            try:
+                return fetch()
+            except Exception as e:
+                if attempt >= self.retries or not is_transient(e):
+                    with self._lock:
+                        self.stats["failures"] += 1
+                    raise
+            # Exponential backoff with jitter so parallel retries spread out
+            delay = min(self.backoff * 2 ** attempt, MAX_BACKOFF) * random.uniform(0.5, 1.0)
+            attempt += 1
+            with self._lock:
+                self.stats["retries"] += 1
+            time.sleep(delay)
+
+    def get(self, url, params=None, timeout=10):
+        # Plain HTTP GET through the shared session; error statuses raise
+        key = ("GET", url, tuple(sorted((params or {}).items())))
+
+        def fetch():
+            response = self.session.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response
+
+        return self.call(key, fetch)
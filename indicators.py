@@ -0,0 +1,251 @@
+import math
+from collections import deque
+
+# Streaming versions of the indicators shown in the analysis panel. Each
+# update costs O(1): moving averages keep a running (compensated) sum, rolling
+# extremes use monotonic deques and RSI keeps rolling gain/loss sums. The
+# results follow pandas' rolling(window) semantics, including NaN propagation.
+
+NAN = float("nan")
+
+MA_WINDOWS = (10, 30, 50, 200)
+STOCH_WINDOW = 14
+STOCH_SMOOTHING = 3
+RSI_WINDOW = 14
+
+
+class RollingSum:
+    # NaN and infinite values are counted rather than summed: like pandas,
+    # any of them in the window makes the sum NaN, and once they leave it
+    # the running total is still exact (inf - inf would poison it for good)
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nans = 0
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def _add(self, value):
+        # Kahan summation keeps the running sum from drifting over long runs
+        y = value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+    def push(self, value):
+        self.values.append(value)
+        if not math.isfinite(value):
+            self.nans += 1
+        else:
+            self._add(value)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if not math.isfinite(old):
+                self.nans -= 1
+            else:
+                self._add(-old)
+
+    def sum(self):
+        if len(self.values) < self.window or self.nans:
+            return NAN
+        return self.total
+
+    def peek(self, value):
+        # Sum as it would be after push(value), without changing state
+        if len(self.values) + 1 < self.window:
+            return NAN
+        nans = self.nans + (not math.isfinite(value))
+        total = self.total
+        if math.isfinite(value):
+            total += value
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if not math.isfinite(old):
+                nans -= 1
+            else:
+                total -= old
+        return NAN if nans else total
+
+    def state(self):
+        return {"values": list(self.values), "total": self.total, "compensation": self.compensation}
+
+    def load(self, state):
+        self.values = deque(state["values"])
+        self.nans = sum(1 for value in self.values if not math.isfinite(value))
+        self.total = state["total"]
+        self.compensation = state["compensation"]
+        if not math.isfinite(self.total):
+            # Saved before infinite values were kept out of the total
+            self.total = self.compensation = 0.0
+            for value in self.values:
+                if math.isfinite(value):
+                    self._add(value)
+
+
+class RollingMean(RollingSum):
+    def mean(self):
+        return self.sum() / self.window
+
+    def peek_mean(self, value):
+        return self.peek(value) / self.window
+
+
+class RollingExtreme:
+    # Rolling min (or max) over a monotonic deque of (position, value)
+    def __init__(self, window, maximum=False):
+        self.window = window
+        self.maximum = maximum
+        self.candidates = deque()
+        self.count = 0
+        self.last_nan = -1
+
+    def _beats(self, a, b):
+        return a >= b if self.maximum else a <= b
+
+    def push(self, value):
+        position = self.count
+        self.count += 1
+        if math.isnan(value):
+            self.last_nan = position
+        else:
+            while self.candidates and self._beats(value, self.candidates[-1][1]):
+                self.candidates.pop()
+            self.candidates.append((position, value))
+        while self.candidates and self.candidates[0][0] <= position - self.window:
+            self.candidates.popleft()
+
+    def value(self):
+        if self.count < self.window or self.last_nan > self.count - 1 - self.window:
+            return NAN
+        return self.candidates[0][1]
+
+    def peek(self, value):
+        position = self.count
+        if position + 1 < self.window or math.isnan(value) or self.last_nan > position - self.window:
+            return NAN
+        best = value
+        for candidate_position, candidate in self.candidates:
+            if candidate_position > position - self.window:
+                # The first candidate still in the window is the extreme of
+                # the existing values
+                if not self._beats(best, candidate):
+                    best = candidate
+                break
+        return best
+
+    def state(self):
+        return {"candidates": [list(c) for c in self.candidates], "count": self.count, "last_nan": self.last_nan}
+
+    def load(self, state):
+        self.candidates = deque((int(p), v) for p, v in state["candidates"])
+        self.count = state["count"]
+        self.last_nan = state["last_nan"]
+
+
+def _stochastic_k(close, low, high):
+    span = high - low
+    if math.isnan(span) or math.isnan(close):
+        return NAN
+    if span == 0:
+        # Same as pandas: x/0 is +/-inf, 0/0 is NaN
+        diff = close - low
+        return NAN if diff == 0 else math.copysign(math.inf, diff)
+    return 100 * ((close - low) / span)
+
+
+def _rsi(gain, loss):
+    if math.isnan(gain) or math.isnan(loss):
+        return NAN
+    if loss == 0:
+        return NAN if gain == 0 else 100.0
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+class IndicatorEngine:
+    # Moving averages, stochastic %K/%D and RSI for one symbol, updated one
+    # bar at a time. push() commits a finished bar; snapshot() reports the
+    # values including an optional provisional bar (e.g. today's, still
+    # forming) without committing it.
+    def __init__(self):
+        self.mas = {window: RollingMean(window) for window in MA_WINDOWS}
+        self.lows = RollingExtreme(STOCH_WINDOW)
+        self.highs = RollingExtreme(STOCH_WINDOW, maximum=True)
+        self.k_values = RollingMean(STOCH_SMOOTHING)
+        self.gains = RollingMean(RSI_WINDOW)
+        self.losses = RollingMean(RSI_WINDOW)
+        self.prev_close = None
+        self.last_ts = None
+        self.last_close = None
+        self.k = NAN
+
+    def _change(self, close):
+        # pandas: delta.where(delta > 0, 0) turns the leading NaN into 0
+        if self.prev_close is None:
+            return 0.0, 0.0
+        delta = close - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        return gain, loss
+
+    def push(self, ts, high, low, close):
+        for ma in self.mas.values():
+            ma.push(close)
+        self.lows.push(low)
+        self.highs.push(high)
+        self.k = _stochastic_k(close, self.lows.value(), self.highs.value())
+        self.k_values.push(self.k)
+        gain, loss = self._change(close)
+        self.gains.push(gain)
+        self.losses.push(loss)
+        self.prev_close = close
+        self.last_ts = ts
+        self.last_close = close
+
+    def snapshot(self, bar=None):
+        if bar is None:
+            return {
+                **{f"ma{window}": ma.mean() for window, ma in self.mas.items()},
+                "k": self.k,
+                "d": self.k_values.mean(),
+                "rsi": _rsi(self.gains.mean(), self.losses.mean()),
+            }
+        _, high, low, close = bar
+        k = _stochastic_k(close, self.lows.peek(low), self.highs.peek(high))
+        gain, loss = self._change(close)
+        return {
+            **{f"ma{window}": ma.peek_mean(close) for window, ma in self.mas.items()},
+            "k": k,
+            "d": self.k_values.peek_mean(k),
+            "rsi": _rsi(self.gains.peek_mean(gain), self.losses.peek_mean(loss)),
+        }
+
+    def state(self):
+        return {
+            "mas": {str(window): ma.state() for window, ma in self.mas.items()},
+            "lows": self.lows.state(),
+            "highs": self.highs.state(),
+            "k_values": self.k_values.state(),
+            "gains": self.gains.state(),
+            "losses": self.losses.state(),
+            "prev_close": self.prev_close,
+            "last_ts": self.last_ts,
+            "last_close": self.last_close,
+            "k": self.k,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls()
+        for window, ma in engine.mas.items():
+            ma.load(state["mas"][str(window)])
+        engine.lows.load(state["lows"])
+        engine.highs.load(state["highs"])
+        engine.k_values.load(state["k_values"])
+        engine.gains.load(state["gains"])
+        engine.losses.load(state["losses"])
+        engine.prev_close = state["prev_close"]
+        engine.last_ts = state["last_ts"]
+        engine.last_close = state["last_close"]
+        engine.k = state["k"]
+        return engine
@@ -0,0 +1,95 @@
+import os
+import random
+
+from PyQt5.QtCore import QObject, QTimer
+
+import market_data
+from bars import BarSeries
+
+# Seconds between polls in live mode
+LIVE_INTERVAL = float(os.environ.get("STOCKSNAPSHOT_LIVE_INTERVAL", "60"))
+MAX_BACKOFF = 15 * 60
+
+
+class YahooSource:
+    # Polls Yahoo for bars newer than the last one on screen
+    def fetch(self, symbol, interval, since_ms):
+        return market_data.fetch_new_bars(symbol, interval, since_ms)
+
+
+class ReplaySource:
+    # Serves recorded bars (BarSeries or DataFrames), revealing `step` more
+    # bars on every poll, so live mode can be driven offline
+    def __init__(self, frames, start=1, step=1):
+        self.series = {
+            symbol: bars if isinstance(bars, BarSeries) else BarSeries.from_frame(bars)
+            for symbol, bars in frames.items()
+        }
+        self.step = step
+        self.cursors = {symbol: start for symbol in frames}
+
+    def fetch(self, symbol, interval, since_ms):
+        bars = self.series[symbol]
+        cursor = min(self.cursors[symbol] + self.step, len(bars))
+        self.cursors[symbol] = cursor
+        return bars[:cursor].since(since_ms)
+
+
+class LiveScheduler(QObject):
+    # Drives live mode: every `interval` seconds (with some jitter) asks
+    # `targets()` for the (symbol, interval, since_ms) triples to poll, fetches
+    # them on the worker pool through `source` and hands each new BarSeries
+    # to `on_bars(symbol, interval, bars)`. Failed polls back off exponentially.
+    def __init__(self, workers, source, targets, on_bars, interval=LIVE_INTERVAL, jitter=0.1, parent=None):
+        super().__init__(parent)
+        self.workers = workers
+        self.source = source
+        self.targets = targets
+        self.on_bars = on_bars
+        self.interval = interval
+        self.jitter = jitter
+        self.failures = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.poll)
+
+    def is_active(self):
+        return self.timer.isActive()
+
+    def start(self):
+        self.failures = 0
+        self.poll()
+
+    def stop(self):
+        self.timer.stop()
+        self.workers.cancel("live")
+
+    def poll(self):
+        requests = self.targets()
+        if not requests:
+            self._schedule()
+            return
+        self.workers.submit("live", self._fetch_all, requests, on_result=self._on_result, on_error=self._on_error)
+
+    def _fetch_all(self, requests):
+        return [
+            (symbol, interval, self.source.fetch(symbol, interval, since_ms))
+            for symbol, interval, since_ms in requests
+        ]
+
+    def _on_result(self, results):
+        self.failures = 0
+        for symbol, interval, bars in results:
+            if not bars.empty:
+                self.on_bars(symbol, interval, bars)
+        self._schedule()
+
+    def _on_error(self, error):
+        self.failures += 1
+        print(f"Error: Live update failed ({error}), retrying later")
+        self._schedule()
+
+    def _schedule(self):
+        delay = min(self.interval * 2 ** self.failures, MAX_BACKOFF)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self.timer.start(int(delay * 1000))
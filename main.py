@@ -1,14 +1,100 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QLineEdit, QTabWidget, QListWidget
-from PyQt5.QtChart import QChart, QChartView, QLineSeries, QDateTimeAxis, QValueAxis, QBarSeries, QBarSet
-from PyQt5.QtCore import Qt, QDateTime
-from PyQt5.QtGui import QColor
-import yfinance as yf
-from yfinance.exceptions import YFPricesMissingError
+import time
+
+# Reference point for the startup timings
+STARTED = time.perf_counter()
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--batch"]:
+    # Headless snapshot mode; keep PyQt5 out of this path entirely
+    from batch import main as run_batch
+    sys.exit(run_batch(sys.argv[2:]))
+if __name__ == "__main__" and sys.argv[1:2] == ["--backtest"]:
+    from backtest import main as run_backtest
+    sys.exit(run_backtest(sys.argv[2:]))
+
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QLineEdit, QTabWidget, QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QAbstractItemView, QLabel
+from PyQt5.QtCore import Qt, QEvent, QTimer
+import tracing
+from gateway import RATE_LIMIT
+from watchlist import SPARKLINE_COLUMN, SparklineDelegate, WatchlistModel, load_watchlist
+from workers import WorkerPool
+
+# yfinance, pandas and QtChart take longer to import than the window takes to
+# build, so the modules that pull them in are imported where they are first
+# used, after the window has painted.
+
+# Watchlist on first run; after that it is whatever the user saved
+WATCHLIST = ["AAPL", "INTC", "NVDA", "TSLA", "GOOG", "AMZN", "META", "TSM", "AVGO", "XOM"]
+# Watchlist symbols whose charts are prefetched at startup
+PREFETCH_SYMBOLS = 10
+# Seconds between watchlist quote refreshes, for lists short enough
+WATCHLIST_INTERVAL = 60
+# Seconds after the startup data before a stale sector index is refreshed,
+# so its ~75 info requests don't compete with the first tab's for the rate limit
+SECTOR_INDEX_DELAY = 15
+INDICES = [("^GSPC", "S&P 500"), ("^DJI", "Dow Jones"), ("^IXIC", "NASDAQ")]
+# Most symbols overlaid on the comparison chart
+MAX_COMPARE = 12
+# Keys of market_data.CHART_INTERVALS
+CHART_PERIODS = ["1d", "5d", "1mo", "6mo", "1y", "5y", "max"]
+
+COMPETITOR_COLUMNS = ["Symbol", "Last", "Change", "Market Cap"]
+
+# Screener columns: header, result column, number format (None for text)
+SCREENER_COLUMNS = [
+    ("Symbol", None, None),
+    ("Close", "close", "{:.2f}"),
+    ("10 Day", "ma10", "{:.2f}"),
+    ("30 Day", "ma30", "{:.2f}"),
+    ("50 Day", "ma50", "{:.2f}"),
+    ("200 Day", "ma200", "{:.2f}"),
+    ("Trend", "trend", None),
+    ("%K", "k", "{:.2f}"),
+    ("%D", "d", "{:.2f}"),
+    ("RSI", "rsi", "{:.2f}"),
+    ("Stochastic", "stochastic_signal", None),
+    ("RSI Signal", "rsi_signal", None),
+]
+
+# Spans summarized in the status bar: label, span name
+STATUS_SPANS = [
+    ("chart", "job:chart"),
+    ("analysis", "job:analysis"),
+    ("competitors", "job:competitors"),
+    ("render", "chart.set_data"),
+]
+
+class SortableItem(QTableWidgetItem):
+    # Sorts by the value stored under Qt.UserRole instead of the display text
+    def __lt__(self, other):
+        mine, theirs = self.data(Qt.UserRole), other.data(Qt.UserRole)
+        if mine is None or theirs is None:
+            return super().__lt__(other)
+        # Missing values sort below everything else
+        if mine != mine:
+            return theirs == theirs
+        if theirs != theirs:
+            return False
+        return mine < theirs
+
+def watchlist_interval(count, rate=RATE_LIMIT):
+    # A refresh costs one rate limit token per symbol; long lists refresh
+    # less often so they never take more than half of the budget
+    return max(WATCHLIST_INTERVAL, 2 * count / rate)
+
+def report_startup(stage, seconds):
+    print(f"Startup: {stage} after {seconds * 1000:.0f} ms")
+
+def placeholder(text):
+    label = QLabel(text)
+    label.setAlignment(Qt.AlignCenter)
+    return label
 
 class StockApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup_hook=report_startup):
         super().__init__()
+        # Called with (stage, seconds since start) for "first paint" and "data ready"
+        self.startup_hook = startup_hook
         self.setWindowTitle("Stock Snapshot")
         self.setGeometry(100, 100, 1200, 600)
 
@@ -48,6 +134,9 @@ class StockApp(QMainWindow):
             }
         """
 
+        # Wider box for a list of symbols
+        self.symbols_box_style = self.search_box_style.replace("120px", "360px")
+
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         main_layout = QVBoxLayout(central_widget)
@@ -57,10 +146,10 @@ class StockApp(QMainWindow):
         main_layout.addWidget(self.tab_widget)
 
         # Create the main stock tab
-        stock_tab = QWidget()
-        self.tab_widget.addTab(stock_tab, "Stock Analysis")
+        self.stock_tab = QWidget()
+        self.tab_widget.addTab(self.stock_tab, "Stock Analysis")
 
-        stock_layout = QVBoxLayout(stock_tab)
+        stock_layout = QVBoxLayout(self.stock_tab)
 
         # Add search box and button at the top
         search_layout = QHBoxLayout()
@@ -79,32 +168,65 @@ class StockApp(QMainWindow):
         columns_layout = QHBoxLayout()
         stock_layout.addLayout(columns_layout)
 
-        # First column: Stock list
+        # First column: the watchlist, saved between runs. The table only
+        # paints the rows on screen, so it stays quick with hundreds of symbols.
         stock_list_column = QVBoxLayout()
         stock_widget = QWidget()
         stock_widget.setLayout(stock_list_column)
-        stock_widget.setFixedWidth(150)  # Set a fixed width for the first column
-        
-        # Add predefined stock buttons
-        stocks = ["AAPL", "INTC", "NVDA", "TSLA", "GOOG", "AMZN", "META", "TSM", "AVGO", "XOM"]
-        for stock in stocks:
-            btn = QPushButton(stock)
-            btn.setStyleSheet(self.button_style)
-            btn.clicked.connect(lambda checked, s=stock: self.update_stock(s))
-            stock_list_column.addWidget(btn)
+        stock_widget.setFixedWidth(340)  # Set a fixed width for the first column
+
+        self.watchlist = WatchlistModel(load_watchlist(WATCHLIST), parent=self)
+        self.watchlist_view = QTableView()
+        self.watchlist_view.setModel(self.watchlist)
+        self.watchlist_view.setItemDelegateForColumn(SPARKLINE_COLUMN, SparklineDelegate(self.watchlist_view))
+        self.watchlist_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.watchlist_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.watchlist_view.verticalHeader().hide()
+        # Fixed row heights let the view skip measuring every row
+        self.watchlist_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.watchlist_view.verticalHeader().setDefaultSectionSize(24)
+        self.watchlist_view.horizontalHeader().setDefaultSectionSize(78)
+        self.watchlist_view.setColumnWidth(0, 72)
+        self.watchlist_view.horizontalHeader().setStretchLastSection(True)
+        self.watchlist_view.clicked.connect(lambda index: self.update_stock(self.watchlist.symbol(index.row())))
+        stock_list_column.addWidget(self.watchlist_view)
+
+        watchlist_buttons = QHBoxLayout()
+        self.watchlist_box = QLineEdit()
+        self.watchlist_box.setPlaceholderText("Add symbol")
+        self.watchlist_box.setStyleSheet(self.search_box_style)
+        self.watchlist_box.returnPressed.connect(self.add_to_watchlist)
+        add_button = QPushButton("Add")
+        add_button.setStyleSheet(self.button_style)
+        add_button.clicked.connect(self.add_to_watchlist)
+        remove_button = QPushButton("Remove")
+        remove_button.setStyleSheet(self.button_style)
+        remove_button.clicked.connect(self.remove_from_watchlist)
+        watchlist_buttons.addWidget(self.watchlist_box)
+        watchlist_buttons.addWidget(add_button)
+        watchlist_buttons.addWidget(remove_button)
+        stock_list_column.addLayout(watchlist_buttons)
         columns_layout.addWidget(stock_widget)
 
-        # Second column: Chart
+        # Second column: Chart (the chart view replaces the placeholder once the window is up)
         chart_column = QVBoxLayout()
-        self.chart_view = QChartView()
-        chart_column.addWidget(self.chart_view)
+        self.chart_column = chart_column
+        self.chart_placeholder = placeholder("Loading chart...")
+        self.chart_view = None
+        self.stock_chart = None
+        chart_column.addWidget(self.chart_placeholder, 1)
         
         time_buttons = QHBoxLayout()
-        for period in ["1d", "5d", "1mo"]:
+        for period in CHART_PERIODS:
             btn = QPushButton(period)
             btn.setStyleSheet(self.button_style)
             btn.clicked.connect(lambda checked, p=period: self.update_chart_period(p))
             time_buttons.addWidget(btn)
+        self.live_button = QPushButton("Live")
+        self.live_button.setStyleSheet(self.button_style)
+        self.live_button.setCheckable(True)
+        self.live_button.toggled.connect(self.toggle_live)
+        time_buttons.addWidget(self.live_button)
         chart_column.addLayout(time_buttons)
         
         columns_layout.addLayout(chart_column)
@@ -113,36 +235,59 @@ class StockApp(QMainWindow):
         analysis_column = QVBoxLayout()
         self.analysis_text = QTextEdit()
         self.analysis_text.setReadOnly(True)
+        self.analysis_text.setPlaceholderText("Loading analysis...")
         analysis_column.addWidget(self.analysis_text)
         columns_layout.addLayout(analysis_column)
 
         # Create the stock competitors tab
-        competitors_tab = QWidget()
-        self.tab_widget.addTab(competitors_tab, "Stock Competitors")
+        self.competitors_tab = QWidget()
+        self.tab_widget.addTab(self.competitors_tab, "Stock Competitors")
 
-        competitors_layout = QVBoxLayout(competitors_tab)
+        competitors_layout = QVBoxLayout(self.competitors_tab)
         
-        # Create a QListWidget to display competitors
-        self.competitors_list = QListWidget()
-        competitors_layout.addWidget(self.competitors_list)
+        # Create a table to display competitors with their latest quote
+        self.competitors_table = QTableWidget(0, len(COMPETITOR_COLUMNS))
+        self.competitors_table.setHorizontalHeaderLabels(COMPETITOR_COLUMNS)
+        self.competitors_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.competitors_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.competitors_table.verticalHeader().hide()
+        competitors_layout.addWidget(self.competitors_table)
 
         # Connect double-click event to update_stock method
-        self.competitors_list.itemDoubleClicked.connect(self.competitor_double_clicked)
+        self.competitors_table.itemDoubleClicked.connect(self.competitor_double_clicked)
+
+        # Create the screener tab
+        self.screener_tab = QWidget()
+        self.tab_widget.addTab(self.screener_tab, "Screener")
+
+        screener_layout = QVBoxLayout(self.screener_tab)
+        self.screener_table = QTableWidget(0, len(SCREENER_COLUMNS))
+        self.screener_table.setHorizontalHeaderLabels([header for header, _, _ in SCREENER_COLUMNS])
+        self.screener_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.screener_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.screener_table.verticalHeader().hide()
+        self.screener_table.cellDoubleClicked.connect(self.screener_double_clicked)
+        screener_layout.addWidget(self.screener_table)
+
+        screener_buttons = QHBoxLayout()
+        refresh_button = QPushButton("Refresh")
+        refresh_button.setStyleSheet(self.button_style)
+        refresh_button.clicked.connect(self.update_screener)
+        screener_buttons.addWidget(refresh_button)
+        screener_buttons.addStretch(1)
+        screener_layout.addLayout(screener_buttons)
 
         # Create the market indices tab
-        indices_tab = QWidget()
-        self.tab_widget.addTab(indices_tab, "Market Indices")
+        self.indices_tab = QWidget()
+        self.tab_widget.addTab(self.indices_tab, "Market Indices")
 
-        indices_layout = QVBoxLayout(indices_tab)
+        indices_layout = QVBoxLayout(self.indices_tab)
         
-        # Create chart views for S&P 500, DOW, and NASDAQ
-        self.sp500_chart_view = QChartView()
-        self.dow_chart_view = QChartView()
-        self.nasdaq_chart_view = QChartView()
-
-        indices_layout.addWidget(self.sp500_chart_view)
-        indices_layout.addWidget(self.dow_chart_view)
-        indices_layout.addWidget(self.nasdaq_chart_view)
+        # Chart views for S&P 500, DOW, and NASDAQ are created when the tab is first opened
+        self.indices_layout = indices_layout
+        self.indices_placeholder = placeholder("Loading indices...")
+        self.index_charts = []
+        indices_layout.addWidget(self.indices_placeholder, 1)
         
         # Add time period buttons at the bottom
         time_buttons_layout = QHBoxLayout()
@@ -153,365 +298,548 @@ class StockApp(QMainWindow):
             time_buttons_layout.addWidget(btn)
         indices_layout.addLayout(time_buttons_layout)
 
+        # Create the comparison tab
+        self.compare_tab = QWidget()
+        self.tab_widget.addTab(self.compare_tab, "Compare")
+
+        compare_layout = QVBoxLayout(self.compare_tab)
+
+        # Symbols to overlay, typed in or picked from a preset
+        compare_controls = QHBoxLayout()
+        self.compare_box = QLineEdit()
+        self.compare_box.setPlaceholderText("Symbols, e.g. AAPL, MSFT, ^GSPC")
+        self.compare_box.setStyleSheet(self.symbols_box_style)
+        self.compare_box.returnPressed.connect(self.compare_entered)
+        compare_button = QPushButton("Compare")
+        compare_button.setStyleSheet(self.button_style)
+        compare_button.clicked.connect(self.compare_entered)
+        compare_controls.addWidget(self.compare_box)
+        compare_controls.addWidget(compare_button)
+        compare_controls.addStretch(1)
+        for label, preset in [("S&P 500", self.compare_with_index), ("Peers", self.compare_with_peers), ("Indices", self.compare_indices)]:
+            btn = QPushButton(label)
+            btn.setStyleSheet(self.button_style)
+            btn.clicked.connect(lambda checked, p=preset: p())
+            compare_controls.addWidget(btn)
+        compare_layout.addLayout(compare_controls)
+
+        # The chart view is created when the tab is first opened
+        self.compare_layout = compare_layout
+        self.compare_placeholder = placeholder("Loading comparison...")
+        self.compare_chart = None
+        compare_layout.addWidget(self.compare_placeholder, 1)
+
+        compare_periods = QHBoxLayout()
+        for period in CHART_PERIODS:
+            btn = QPushButton(period)
+            btn.setStyleSheet(self.button_style)
+            btn.clicked.connect(lambda checked, p=period: self.update_compare_period(p))
+            compare_periods.addWidget(btn)
+        compare_layout.addLayout(compare_periods)
+
+        # Network fetches run on background threads so the window stays responsive
+        self.workers = WorkerPool(self)
+        self.sector_index = None
+        # Live mode polls the latest bars for the visible charts and streams
+        # ticks for the 5 minute ones; both are created on first use
+        self.live = None
+        self.stream = None
+        # Latest streamed quote per symbol, for the analysis panel
+        self.live_quotes = {}
+
         self.current_stock = "AAPL"
+        # Last symbol whose chart loaded, to return to when a lookup fails
+        self.shown_stock = "AAPL"
         self.current_period = "1d"
-        self.update_stock(self.current_stock)
-        self.update_indices_charts("1d")  # Default to 1 day view
+        self.current_indices_period = "1d"
+        # (symbol, interval) of the bars on the stock chart, and the period
+        # of the index charts; a new period shows only once its data arrives
+        self.chart_shown = None
+        self.indices_shown = None
+        self.compare_symbols = None
+        self.compare_period = "1mo"
+
+        # Each tab loads its data the first time it is shown
+        self.tab_loaders = {
+            self.stock_tab: lambda: self.update_stock(self.current_stock),
+            self.competitors_tab: self.update_competitors,
+            self.screener_tab: self.update_screener,
+            self.indices_tab: self.load_indices_tab,
+            self.compare_tab: self.load_compare_tab,
+        }
+        self.loaded_tabs = set()
+        self.data_ready = False
+        self.painted = False
+        self.tab_widget.currentChanged.connect(self.tab_changed)
+
+        # Status bar with the latest stage timings and a trace export button
+        self.timings_label = QLabel()
+        self.statusBar().addPermanentWidget(self.timings_label)
+        export_button = QPushButton("Export trace")
+        export_button.clicked.connect(self.export_trace)
+        self.statusBar().addPermanentWidget(export_button)
+        # Watchlist quotes refresh in one batched fetch per cycle
+        self.watchlist_refreshing = False
+        self.watchlist_timer = QTimer(self)
+        self.watchlist_timer.timeout.connect(self.refresh_watchlist)
+
+        self.timings_timer = QTimer(self)
+        self.timings_timer.timeout.connect(self.update_timings)
+        self.timings_timer.start(1000)
+
+    def event(self, event):
+        if event.type() == QEvent.Paint and not self.painted:
+            self.painted = True
+            # Start the real work once control is back in the event loop
+            QTimer.singleShot(0, self.first_paint_done)
+        return super().event(event)
+
+    def first_paint_done(self):
+        self.startup_hook("first paint", time.perf_counter() - STARTED)
+        self.build_stock_chart()
+        # Pull the whole watchlist in one batched request, then draw the
+        # current tab from the warmed cache. The heavy imports happen on the
+        # worker thread as part of this job.
+        self.workers.submit(
+            "prefetch", self.prefetch_startup_data, self.startup_symbols(),
+            on_result=lambda elapsed: self.startup_data_ready(elapsed),
+            on_error=lambda e: self.startup_data_ready(None),
+        )
+
+    def build_stock_chart(self):
+        if self.stock_chart is not None:
+            return
+        from PyQt5.QtChart import QChartView
+        from charts import ChartController
+        self.chart_view = QChartView()
+        self.stock_chart = ChartController(self.chart_view, show_volume=True, price_title="Price")
+        self.chart_column.replaceWidget(self.chart_placeholder, self.chart_view)
+        self.chart_placeholder.deleteLater()
+
+    def startup_symbols(self):
+        symbols = [self.current_stock] + self.watchlist.symbols[:PREFETCH_SYMBOLS]
+        return list(dict.fromkeys(symbols))
+
+    def prefetch_startup_data(self, symbols):
+        import market_data
+        return market_data.prefetch(symbols, "1d", "5m")
+
+    def startup_data_ready(self, elapsed):
+        import market_data
+        from competitors import SectorIndex
+        if elapsed is not None:
+            print(f"Startup prefetch: {len(self.startup_symbols())} symbols in {elapsed:.2f}s")
+        self.sector_index = SectorIndex()
+        self.data_ready = True
+        self.load_tab(self.tab_widget.currentWidget())
+        self.startup_hook("data ready", time.perf_counter() - STARTED)
+        # Daily history for the analysis panel is warmed afterwards, off the critical path
+        others = [symbol for symbol in self.startup_symbols() if symbol != self.current_stock]
+        self.workers.submit("prefetch", market_data.prefetch, others, "1y", "1d")
+        QTimer.singleShot(SECTOR_INDEX_DELAY * 1000, self.refresh_sector_index)
+        self.refresh_watchlist()
+        self.watchlist_timer.start()
+
+    def refresh_sector_index(self):
+        # Keep the sector index used for competitor discovery up to date. One
+        # fetch at a time, so it never queues ahead of the user's requests for
+        # more than one rate limit token.
+        from screener import screener_universe
+        universe = screener_universe(list(self.watchlist.symbols))
+        if self.sector_index.stale(universe):
+            self.workers.submit("sector_index", self.sector_index.refresh, universe, workers=1)
+
+    def tab_changed(self, index):
+        self.load_tab(self.tab_widget.widget(index))
+
+    def load_tab(self, tab):
+        # Tabs opened before the startup data arrived are loaded from startup_data_ready()
+        if self.data_ready and tab not in self.loaded_tabs:
+            self.loaded_tabs.add(tab)
+            self.tab_loaders[tab]()
 
     def update_stock(self, stock):
-        try:
-            self.current_stock = stock
-            self.update_chart()
-            self.update_analysis()
-            self.update_competitors()
-        except YFPricesMissingError:
-            print(f"Error: No price data found for {stock}. Defaulting to AAPL.")
-            self.current_stock = "AAPL"
-            self.update_chart()
-            self.update_analysis()
-            self.update_competitors()
+        self.current_stock = stock
+        self.loaded_tabs.add(self.stock_tab)
+        # STOCKSNAPSHOT_PROFILE profiles the jobs of the first refresh
+        profile = tracing.take_profile_request()
+        if profile:
+            self.workers.profile_next(["chart", "analysis"], profile)
+        # Chart and analysis load in parallel; a newer click on another
+        # symbol makes these jobs stale and their results are dropped.
+        self.update_chart()
+        self.update_analysis()
+        # Competitors are only fetched when their tab is (next) shown
+        self.loaded_tabs.discard(self.competitors_tab)
+        if self.tab_widget.currentWidget() is self.competitors_tab:
+            self.load_tab(self.competitors_tab)
+
+    def stock_load_failed(self, symbol, error):
+        from yfinance.exceptions import YFPricesMissingError, YFRateLimitError
+        if symbol != self.current_stock:
+            return
+        if isinstance(error, YFRateLimitError):
+            # Still throttled after the gateway's retries; keep what is shown
+            message = f"Yahoo is rate limiting requests, {symbol} could not be loaded. Try again shortly."
+        elif isinstance(error, (YFPricesMissingError, IndexError)):
+            message = f"No price data found for {symbol}."
+            if symbol != self.shown_stock:
+                # Go back to the last symbol that loaded rather than a fixed default
+                message += f" Showing {self.shown_stock}."
+                self.update_stock(self.shown_stock)
+        else:
+            message = f"Failed to load {symbol}: {error}"
+        print(f"Error: {message}")
+        self.statusBar().showMessage(message, 10000)
 
     def update_chart_period(self, period):
         self.current_period = period
         self.update_chart()
 
     def update_chart(self):
-        try:
-            stock_data = yf.download(self.current_stock, period=self.current_period, interval="5m")
-            
-            # Price series
-            price_series = QLineSeries()
-            # Volume series
-            volume_series = QBarSeries()
-            volume_set = QBarSet("")  # Remove the "Volume" label
-            
-            for index, row in stock_data.iterrows():
-                date_time = QDateTime()
-                date_time.setSecsSinceEpoch(int(index.timestamp()))
-                price_series.append(date_time.toMSecsSinceEpoch(), row['Close'])
-                volume_set.append(row['Volume'])
-
-            volume_series.append(volume_set)
-
-            chart = QChart()
-            chart.addSeries(price_series)
-            chart.addSeries(volume_series)
-            chart.setTitle(f"{self.current_stock} - {self.current_period}")
-
-            # Create and set up the X-axis (date/time)
-            axis_x = QDateTimeAxis()
-            axis_x.setFormat("MM-dd HH:mm")
-            axis_x.setTickCount(5)
-            chart.addAxis(axis_x, Qt.AlignBottom)
-            price_series.attachAxis(axis_x)
-            volume_series.attachAxis(axis_x)
-
-            # Create and set up the Y-axis for price
-            axis_y_price = QValueAxis()
-            axis_y_price.setTitleText("Price")
-            chart.addAxis(axis_y_price, Qt.AlignLeft)
-            price_series.attachAxis(axis_y_price)
-
-            # Create and set up the Y-axis for volume
-            axis_y_volume = QValueAxis()
-            axis_y_volume.setTitleText("Volume")
-            chart.addAxis(axis_y_volume, Qt.AlignRight)
-            volume_series.attachAxis(axis_y_volume)
-
-            # Set the range for volume axis
-            max_volume = stock_data['Volume'].max()
-            axis_y_volume.setRange(0, max_volume * 1.1)  # Add 10% margin
-
-            # Set colors and style for price series
-            price_series.setColor(QColor(255, 0, 0))  # Red color
-            pen = price_series.pen()
-            pen.setStyle(Qt.DashLine)
-            pen.setWidth(2)
-            price_series.setPen(pen)
-
-            # Hide the legend
-            chart.legend().hide()
-
-            self.chart_view.setChart(chart)
-        except YFPricesMissingError:
-            print(f"Error: No price data found for {self.current_stock} in update_chart. Using AAPL.")
-            self.current_stock = "AAPL"
-            stock_data = yf.download(self.current_stock, period=self.current_period, interval="5m")
-            
-            # Price series
-            price_series = QLineSeries()
-            # Volume series
-            volume_series = QBarSeries()
-            volume_set = QBarSet("")  # Remove the "Volume" label
-            
-            for index, row in stock_data.iterrows():
-                date_time = QDateTime()
-                date_time.setSecsSinceEpoch(int(index.timestamp()))
-                price_series.append(date_time.toMSecsSinceEpoch(), row['Close'])
-                volume_set.append(row['Volume'])
-
-            volume_series.append(volume_set)
-
-            chart = QChart()
-            chart.addSeries(price_series)
-            chart.addSeries(volume_series)
-            chart.setTitle(f"{self.current_stock} - {self.current_period}")
-
-            # Create and set up the X-axis (date/time)
-            axis_x = QDateTimeAxis()
-            axis_x.setFormat("MM-dd HH:mm")
-            axis_x.setTickCount(5)
-            chart.addAxis(axis_x, Qt.AlignBottom)
-            price_series.attachAxis(axis_x)
-            volume_series.attachAxis(axis_x)
-
-            # Create and set up the Y-axis for price
-            axis_y_price = QValueAxis()
-            axis_y_price.setTitleText("Price")
-            chart.addAxis(axis_y_price, Qt.AlignLeft)
-            price_series.attachAxis(axis_y_price)
-
-            # Create and set up the Y-axis for volume
-            axis_y_volume = QValueAxis()
-            axis_y_volume.setTitleText("Volume")
-            chart.addAxis(axis_y_volume, Qt.AlignRight)
-            volume_series.attachAxis(axis_y_volume)
-
-            # Set the range for volume axis
-            max_volume = stock_data['Volume'].max()
-            axis_y_volume.setRange(0, max_volume * 1.1)  # Add 10% margin
-
-            # Set colors and style for price series
-            price_series.setColor(QColor(255, 0, 0))  # Red color
-            pen = price_series.pen()
-            pen.setStyle(Qt.DashLine)
-            pen.setWidth(2)
-            price_series.setPen(pen)
-
-            # Hide the legend
-            chart.legend().hide()
-
-            self.chart_view.setChart(chart)
-
-    def update_analysis(self):
-        stock = yf.Ticker(self.current_stock)
-        stock_data = stock.history(period="1y")
-        
-        # Calculate moving averages
-        ma10 = stock_data['Close'].rolling(window=10).mean().iloc[-1]
-        ma30 = stock_data['Close'].rolling(window=30).mean().iloc[-1]
-        ma50 = stock_data['Close'].rolling(window=50).mean().iloc[-1]
-        ma200 = stock_data['Close'].rolling(window=200).mean().iloc[-1]
-        
-        # Calculate Stochastic Oscillator
-        low_14 = stock_data['Low'].rolling(window=14).min()
-        high_14 = stock_data['High'].rolling(window=14).max()
-        k = 100 * ((stock_data['Close'] - low_14) / (high_14 - low_14))
-        d = k.rolling(window=3).mean()
-        current_k = k.iloc[-1]
-        current_d = d.iloc[-1]
-
-        # Calculate RSI
-        delta = stock_data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        current_rsi = rsi.iloc[-1]
-
-        # Prepare analysis text
-        analysis = f"Analysis for {self.current_stock}:\n\n"
-        
-        def format_value(value, decimal_places=2):
-            if isinstance(value, (int, float)):
-                return f"{value:.{decimal_places}f}"
-            return str(value)
-
-        # Add fundamental data
-        info = stock.info
-        analysis += "Fundamental Data:\n"
-        analysis += f"Market Cap: ${info.get('marketCap', 'N/A'):,}\n"
-        
-        # Fix for P/E Ratio
-        pe_ratio = info.get('trailingPE', 'N/A')
-        analysis += f"P/E Ratio: {format_value(pe_ratio)}\n"
-        
-        # Fix for EPS
-        eps = info.get('trailingEps', 'N/A')
-        analysis += f"EPS (TTM): ${format_value(eps)}\n"
-        
-        # Fix for Forward P/E
-        forward_pe = info.get('forwardPE', 'N/A')
-        analysis += f"Forward P/E: {format_value(forward_pe)}\n"
-        
-        # Handle dividend yield formatting
-        dividend_yield = info.get('dividendYield', 'N/A')
-        if isinstance(dividend_yield, (int, float)):
-            analysis += f"Dividend Yield: {dividend_yield:.2%}\n"
+        import market_data
+        symbol, period = self.current_stock, self.current_period
+        self.workers.submit(
+            "chart", market_data.fetch_chart_data, symbol, period,
+            on_result=lambda data: self.show_chart(symbol, period, data),
+            on_error=lambda e: self.stock_load_failed(symbol, e),
+        )
+
+    def show_chart(self, symbol, period, bars):
+        import market_data
+        self.build_stock_chart()
+        if not bars.empty:
+            self.shown_stock = symbol
+        self.chart_shown = (symbol, market_data.chart_interval(period))
+        if market_data.is_intraday(market_data.chart_interval(period)):
+            time_format = "MM-dd HH:mm"
         else:
-            analysis += f"Dividend Yield: {dividend_yield}\n"
-        
-        analysis += f"52 Week High: ${format_value(info.get('fiftyTwoWeekHigh', 'N/A'))}\n"
-        analysis += f"52 Week Low: ${format_value(info.get('fiftyTwoWeekLow', 'N/A'))}\n"
+            time_format = "yyyy-MM-dd"
+        self.stock_chart.set_data(bars, f"{symbol} - {period}", time_format)
+        self.update_stream()
 
-        analysis += "\n"
-
-        # Add existing technical analysis
-        analysis += f"Moving Averages:\n"
-        analysis += f"10 Day: {ma10:.2f}\n"
-        analysis += f"30 Day: {ma30:.2f}\n"
-        analysis += f"50 Day: {ma50:.2f}\n"
-        analysis += f"200 Day: {ma200:.2f}\n"
-        
-        if ma10 > ma30 and ma30 > ma50:
-            analysis += "Interpretation: Strong uptrend. All shorter-term MAs above longer-term MAs.\n\n"
-        elif ma10 < ma30 and ma30 < ma50:
-            analysis += "Interpretation: Strong downtrend. All shorter-term MAs below longer-term MAs.\n\n"
-        elif ma10 > ma30 > ma50:
-            analysis += "Interpretation: Potential bullish trend. Shorter-term MAs rising faster than longer-term MAs.\n\n"
-        elif ma10 < ma30 < ma50:
-            analysis += "Interpretation: Potential bearish trend. Shorter-term MAs falling faster than longer-term MAs.\n\n"
-        else:
-            analysis += "Interpretation: Mixed signals. No clear trend direction.\n\n"
-
-        analysis += f"Stochastic Oscillator:\n"
-        analysis += f"%K: {current_k:.2f}\n"
-        analysis += f"%D: {current_d:.2f}\n"
-        if current_k > 80 and current_d > 80:
-            analysis += "Interpretation: Overbought condition\n"
-        elif current_k < 20 and current_d < 20:
-            analysis += "Interpretation: Oversold condition\n"
+    def update_analysis(self):
+        symbol = self.current_stock
+        self.workers.submit(
+            "analysis", self.analyze_stock, symbol, self.live_quotes.get(symbol),
+            on_result=self.show_analysis,
+            on_error=lambda e: self.stock_load_failed(symbol, e),
+        )
+
+    def analyze_stock(self, symbol, live=None):
+        # Runs on a worker thread, so it must not touch any widgets
+        from analysis import compute_snapshot, format_analysis
+        return format_analysis(compute_snapshot(symbol, live))
+
+    def show_analysis(self, analysis):
+        # Live refreshes often produce identical text; skip the redraw then
+        if analysis != self.analysis_text.toPlainText():
+            self.analysis_text.setText(analysis)
+
+    def toggle_live(self, enabled):
+        if self.live is None:
+            from live import LiveScheduler, YahooSource
+            from streaming import STREAM_ENABLED, TickStream
+            self.live = LiveScheduler(self.workers, YahooSource(), self.live_targets, self.live_bars_arrived, parent=self)
+            if STREAM_ENABLED:
+                self.stream = TickStream(self.stream_updated, parent=self)
+                self.stream.status_changed.connect(lambda message: self.statusBar().showMessage(message, 5000))
+        if enabled:
+            self.live.start()
+            self.update_stream()
         else:
-            analysis += "Interpretation: Neutral\n\n"
+            self.live.stop()
+            if self.stream is not None:
+                self.stream.stop()
+            self.live_quotes = {}
+
+    def live_charts(self):
+        # (symbol, interval, chart) for each intraday chart on screen, by
+        # what it shows rather than what was last asked for
+        import market_data
+        charts = []
+        if self.chart_shown is not None and market_data.is_intraday(self.chart_shown[1]):
+            charts.append((*self.chart_shown, self.stock_chart))
+        if self.indices_shown == "1d":
+            for (symbol, _), controller in zip(INDICES, self.index_charts):
+                charts.append((symbol, "5m", controller))
+        return charts
+
+    def live_targets(self):
+        return [
+            (symbol, interval, chart.last_timestamp())
+            for symbol, interval, chart in self.live_charts()
+            if chart.last_timestamp() is not None
+        ]
+
+    def update_stream(self):
+        # Stream ticks for the 5 minute charts on screen, continuing their last bar
+        if self.stream is None or not self.live_button.isChecked():
+            return
+        from streaming import INTERVAL
+        seeds = {
+            symbol: (int(chart.x[-1]), float(chart.y[-1]), int(chart.volume[-1]))
+            for symbol, interval, chart in self.live_charts()
+            if interval == INTERVAL and len(chart.x)
+        }
+        self.live_quotes = {symbol: quote for symbol, quote in self.live_quotes.items() if symbol in seeds}
+        if seeds or self.stream.is_active():
+            self.stream.watch(seeds)
+
+    def stream_updated(self, symbol, bars, quote):
+        # Bars built from streamed ticks; the next poll replaces them with Yahoo's own
+        from streaming import INTERVAL
+        for chart_symbol, interval, chart in self.live_charts():
+            if chart_symbol == symbol and interval == INTERVAL:
+                chart.append_data(bars)
+        if symbol == self.current_stock:
+            # The forming daily bar moved, so the indicators did too
+            self.live_quotes[symbol] = quote
+            self.update_analysis()
 
-        analysis += f"Relative Strength Index (RSI): {current_rsi:.2f}\n"
-        if current_rsi > 70:
-            analysis += "Interpretation: Overbought condition\n"
-        elif current_rsi < 30:
-            analysis += "Interpretation: Oversold condition\n"
-        else:
-            analysis += "Interpretation: Neutral\n"
-        
-        # Fetch analyst price targets
-        try:
-            price_targets = stock.get_analyst_price_targets()
-            analysis += f"\nAnalyst Price Targets:\n"
-            analysis += f"Current price: ${price_targets['current']:.2f}\n"
-            analysis += f"Low price: ${price_targets['low']:.2f}\n"
-            analysis += f"High price: ${price_targets['high']:.2f}\n"
-            analysis += f"Mean price: ${price_targets['mean']:.2f}\n"
-            analysis += f"Median price: ${price_targets['median']:.2f}\n"
-        except Exception as e:
-            analysis += f"\nAnalyst Price Targets: Data not available\n"
-
-        self.analysis_text.setText(analysis)
+    def live_bars_arrived(self, symbol, interval, bars):
+        # A poll started before a symbol or period switch returns bars for
+        # what was on screen then; only charts still showing that symbol at
+        # that interval take them
+        import market_data
+        for chart_symbol, chart_interval, chart in self.live_charts():
+            if chart_symbol != symbol or chart_interval != interval or not chart.append_data(bars):
+                continue
+            if chart is self.stock_chart and symbol == self.current_stock:
+                # Today's daily bar moved too, so refresh the indicators
+                market_data.invalidate_history(symbol, "1d")
+                self.update_analysis()
+
+    def refresh_watchlist(self):
+        # A cycle still fetching when the timer fires is left to finish
+        # rather than replaced, so a slow refresh never piles up jobs
+        if self.watchlist_refreshing:
+            return
+        self.watchlist_refreshing = True
+        self.watchlist_timer.setInterval(int(watchlist_interval(len(self.watchlist.symbols)) * 1000))
+        self.workers.submit(
+            "watchlist", self.watchlist_quotes, list(self.watchlist.symbols),
+            on_result=self.watchlist_refreshed, on_error=self.watchlist_refresh_failed,
+        )
+
+    def watchlist_refreshed(self, quotes):
+        self.watchlist_refreshing = False
+        self.watchlist.update_quotes(quotes)
+
+    def watchlist_refresh_failed(self, error):
+        self.watchlist_refreshing = False
+        print(f"Error: Watchlist refresh failed ({error})")
+
+    def watchlist_quotes(self, symbols):
+        # Runs on a worker thread: one batched download for whatever isn't cached
+        import market_data
+        from chart_data import session_quote
+        series = market_data.get_many(symbols, "5d", "5m")
+        quotes = {}
+        for symbol, bars in series.items():
+            quote = session_quote(bars)
+            if quote is not None:
+                quotes[symbol] = quote
+        return quotes
+
+    def add_to_watchlist(self):
+        symbol = self.watchlist_box.text().strip().upper()
+        if symbol and self.watchlist.add_symbol(symbol):
+            self.watchlist_box.clear()
+            # Quote just the new symbol; the next cycle picks it up with the rest
+            self.workers.submit(f"watchlist_add:{symbol}", self.watchlist_quotes, [symbol], on_result=self.watchlist.update_quotes)
+
+    def remove_from_watchlist(self):
+        rows = [index.row() for index in self.watchlist_view.selectionModel().selectedRows()]
+        if rows:
+            self.watchlist.remove_rows(rows)
 
     def search_stock(self):
         stock_symbol = self.search_box.text().upper()
         if stock_symbol:
-            try:
-                self.update_stock(stock_symbol)
-            except IndexError:
-                print(f"Error: No price data found for {stock_symbol}. Defaulting to AAPL.")
-                self.current_stock = "AAPL"
-                self.search_box.setText("Defaulting to AAPL")
-                self.update_stock(self.current_stock)
+            self.update_stock(stock_symbol)
+
+    def load_indices_tab(self):
+        from PyQt5.QtChart import QChartView
+        from charts import ChartController
+        # Create chart views for S&P 500, DOW, and NASDAQ
+        self.sp500_chart_view = QChartView()
+        self.dow_chart_view = QChartView()
+        self.nasdaq_chart_view = QChartView()
+
+        self.indices_layout.replaceWidget(self.indices_placeholder, self.sp500_chart_view)
+        self.indices_placeholder.deleteLater()
+        self.indices_layout.insertWidget(1, self.dow_chart_view)
+        self.indices_layout.insertWidget(2, self.nasdaq_chart_view)
+        self.index_charts = [
+            ChartController(view) for view in (self.sp500_chart_view, self.dow_chart_view, self.nasdaq_chart_view)
+        ]
+        self.update_indices_charts(self.current_indices_period)
 
     def update_indices_charts(self, period):
-        indices = [("^GSPC", "S&P 500"), ("^DJI", "Dow Jones"), ("^IXIC", "NASDAQ")]
-        chart_views = [self.sp500_chart_view, self.dow_chart_view, self.nasdaq_chart_view]
-
-        for (symbol, name), chart_view in zip(indices, chart_views):
-            data = yf.download(symbol, period=period, interval="5m" if period == "1d" else "1d")
-            
-            series = QLineSeries()
-            for index, row in data.iterrows():
-                date_time = QDateTime()
-                date_time.setSecsSinceEpoch(int(index.timestamp()))
-                series.append(date_time.toMSecsSinceEpoch(), row['Close'])
-
-            chart = QChart()
-            chart.addSeries(series)
-            chart.setTitle(f"{name} - {period}")
-
-            axis_x = QDateTimeAxis()
-            if period == "1d":
-                axis_x.setFormat("HH:mm")
-            elif period == "5d":
-                axis_x.setFormat("MM-dd HH:mm")
-            else:
-                axis_x.setFormat("MM-dd")
-            axis_x.setTickCount(5)
-            chart.addAxis(axis_x, Qt.AlignBottom)
-            series.attachAxis(axis_x)
-
-            axis_y = QValueAxis()
-            chart.addAxis(axis_y, Qt.AlignLeft)
-            series.attachAxis(axis_y)
-
-            series.setColor(QColor(255, 0, 0))  # Red color
-            pen = series.pen()
-            pen.setStyle(Qt.DashLine)  # Dashed line
-            pen.setWidth(2)
-            series.setPen(pen)
-
-            chart.legend().hide()
-            chart_view.setChart(chart)
+        import market_data
+        self.current_indices_period = period
+        symbols = [symbol for symbol, _ in INDICES]
+        interval = "5m" if period == "1d" else "1d"
+        self.workers.submit(
+            "indices", market_data.get_many, symbols, period, interval,
+            on_result=lambda series: self.show_indices_charts(period, series),
+        )
+
+    def show_indices_charts(self, period, series):
+        if period == "1d":
+            time_format = "HH:mm"
+        elif period == "5d":
+            time_format = "MM-dd HH:mm"
+        else:
+            time_format = "MM-dd"
+        for (symbol, name), controller in zip(INDICES, self.index_charts):
+            controller.set_data(series[symbol], f"{name} - {period}", time_format)
+        self.indices_shown = period
+        self.update_stream()
+
+    def load_compare_tab(self):
+        from PyQt5.QtChart import QChartView
+        from charts import ComparisonController
+        self.compare_view = QChartView()
+        self.compare_chart = ComparisonController(self.compare_view)
+        self.compare_layout.replaceWidget(self.compare_placeholder, self.compare_view)
+        self.compare_placeholder.deleteLater()
+        if self.compare_symbols is None:
+            self.compare_with_index()
+        else:
+            self.update_comparison()
+
+    def compare_entered(self):
+        symbols = [s.strip().upper() for s in self.compare_box.text().replace(",", " ").split()]
+        if symbols:
+            self.update_comparison(list(dict.fromkeys(symbols))[:MAX_COMPARE])
+
+    def compare_with_index(self):
+        self.update_comparison([self.current_stock, INDICES[0][0]])
+
+    def compare_with_peers(self):
+        self.update_comparison(peers_of=self.current_stock)
+
+    def compare_indices(self):
+        self.update_comparison([symbol for symbol, _ in INDICES])
+
+    def update_compare_period(self, period):
+        self.compare_period = period
+        self.update_comparison()
+
+    def update_comparison(self, symbols=None, peers_of=None):
+        if symbols is not None:
+            self.compare_symbols = symbols
+        if self.compare_chart is None:
+            # Drawn once the tab is opened
+            return
+        period = self.compare_period
+        self.workers.submit(
+            "compare", self.build_comparison, self.compare_symbols, period, peers_of,
+            on_result=self.show_comparison,
+            on_error=lambda e: self.statusBar().showMessage(f"Comparison failed: {e}", 10000),
+        )
+
+    def build_comparison(self, symbols, period, peers_of=None):
+        # Runs on a worker thread: fetch every symbol in one batch and align them
+        import market_data
+        from chart_data import percent_change_panel
+        if peers_of is not None:
+            symbols = [peers_of] + self.find_peers(peers_of)[:MAX_COMPARE - 1]
+        series = market_data.get_many(symbols, period, market_data.chart_interval(period))
+        symbols = [symbol for symbol in symbols if not series[symbol].empty]
+        x, panel = percent_change_panel([series[symbol] for symbol in symbols])
+        return symbols, period, x, panel
+
+    def show_comparison(self, result):
+        import market_data
+        symbols, period, x, panel = result
+        self.compare_symbols = symbols
+        self.compare_box.setText(", ".join(symbols))
+        if market_data.is_intraday(market_data.chart_interval(period)):
+            time_format = "MM-dd HH:mm"
+        else:
+            time_format = "yyyy-MM-dd"
+        self.compare_chart.set_data(symbols, x, panel, f"% change - {period}", time_format)
 
     def update_competitors(self):
-        # Clear the current list
-        self.competitors_list.clear()
-
-        # Fetch competitor data
-        stock = yf.Ticker(self.current_stock)
+        symbol = self.current_stock
+        self.workers.submit(
+            "competitors", self.find_competitors, symbol,
+            on_result=self.show_competitors,
+            on_error=lambda e: self.stock_load_failed(symbol, e),
+        )
+
+    def find_peers(self, symbol):
+        import market_data
+        from analysis import DEFAULT_COMPETITORS
+        from competitors import MAX_PEERS
         try:
-            # Try to get competitors from the info
-            sector = stock.info.get('sector', '')
-            industry = stock.info.get('industry', '')
-            competitors = self.get_sector_competitors(sector, industry)
+            # Try to get competitors from the (shared, cached) info
+            info = market_data.get_info(symbol)
+            self.sector_index.record(symbol, info)
+            sector = info.get('sector', '')
+            industry = info.get('industry', '')
+            return self.sector_index.peers(symbol, sector, industry)
         except:
             # If there's an error, use a default list
-            competitors = ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NVDA", "JPM", "JNJ", "V"]
-
-        # Remove the current stock from the competitors list if it's there
-        competitors = [comp for comp in competitors if comp != self.current_stock]
-
-        # Add competitors to the list
-        for competitor in competitors[:10]:  # Limit to 10 competitors
-            self.competitors_list.addItem(competitor)
-
-    def get_sector_competitors(self, sector, industry):
-        # This is a simplified example. You might want to expand this with more sectors and stocks.
-        sector_competitors = {
-            "Technology": {
-                "Software": ["MSFT", "ORCL", "CRM", "ADBE", "INTU", "NOW", "WDAY", "TEAM", "ZS", "PANW"],
-                "Hardware": ["AAPL", "DELL", "HPQ", "LEN", "NTAP", "WDC", "STX", "LOGI", "JNPR", "CSCO"],
-                "Semiconductors": ["NVDA", "INTC", "AMD", "TSM", "AVGO", "QCOM", "TXN", "AMAT", "LRCX", "MU"],
-            },
-            "Communication Services": {
-                "Internet Content & Information": ["GOOGL", "META", "TWTR", "SNAP", "PINS", "MTCH", "SPOT", "ZM", "NFLX", "DIS"],
-            },
-            "Consumer Cyclical": {
-                "Internet Retail": ["AMZN", "BABA", "JD", "EBAY", "ETSY", "W", "CHWY", "CVNA", "FTCH", "OSTK"],
-            },
-            "Financial Services": {
-                "Banks": ["JPM", "BAC", "WFC", "C", "GS", "MS", "USB", "PNC", "TFC", "FITB"],
-            },
-            "Healthcare": {
-                "Drug Manufacturers": ["JNJ", "PFE", "MRK", "ABBV", "LLY", "BMY", "AMGN", "GILD", "BIIB", "VRTX"],
-            },
-        }
-
-        if sector in sector_competitors and industry in sector_competitors[sector]:
-            return sector_competitors[sector][industry]
-        elif sector in sector_competitors:
-            return [stock for industry_list in sector_competitors[sector].values() for stock in industry_list]
+            return [comp for comp in DEFAULT_COMPETITORS if comp != symbol][:MAX_PEERS]
+
+    def find_competitors(self, symbol):
+        return self.sector_index.quotes(self.find_peers(symbol))
+
+    def show_competitors(self, rows):
+        from competitors import PREFETCH_PEERS, format_market_cap, prefetch_peers
+        table = self.competitors_table
+        table.setSortingEnabled(False)
+        table.setRowCount(len(rows))
+        for row, quote in enumerate(rows):
+            cells = [(quote["symbol"], None)]
+            last, change, market_cap = quote["last"], quote["change"], quote["marketCap"]
+            cells.append((f"${last:.2f}" if last is not None else "N/A", last))
+            cells.append((f"{change:+.2%}" if change is not None else "N/A", change))
+            cells.append((format_market_cap(market_cap), market_cap))
+            for column, (text, value) in enumerate(cells):
+                item = SortableItem(text)
+                if column:
+                    item.setData(Qt.UserRole, float(value) if value is not None else float("nan"))
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
+
+        # Warm the cache for the top peers in the background
+        top_peers = [quote["symbol"] for quote in rows[:PREFETCH_PEERS]]
+        self.workers.submit("peers", prefetch_peers, top_peers, self.current_period)
+
+    def update_timings(self):
+        latest = tracing.latest([name for _, name in STATUS_SPANS])
+        text = "  ".join(
+            f"{label} {latest[name] * 1000:.0f} ms" for label, name in STATUS_SPANS if name in latest
+        )
+        if text != self.timings_label.text():
+            self.timings_label.setText(text)
+
+    def export_trace(self):
+        try:
+            path = tracing.export_chrome_trace()
+        except OSError as e:
+            self.statusBar().showMessage(f"Could not write trace: {e}", 5000)
         else:
-            return ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NVDA", "JPM", "JNJ", "V"]
+            self.statusBar().showMessage(f"Trace written to {path}", 5000)
+
+    def closeEvent(self, event):
+        if self.live is not None:
+            self.live.stop()
+        if self.stream is not None:
+            self.stream.stop()
+        self.workers.shutdown()
+        super().closeEvent(event)
 
     def competitor_double_clicked(self, item):
-        # Get the stock symbol from the clicked item
-        competitor_stock = item.text()
+        # Get the stock symbol from the clicked row
+        competitor_stock = self.competitors_table.item(item.row(), 0).text()
         
         # Update the stock
         self.update_stock(competitor_stock)
@@ -519,6 +847,45 @@ class StockApp(QMainWindow):
         # Switch to the Stock Analysis tab
         self.tab_widget.setCurrentIndex(0)  # Assuming Stock Analysis is the first tab
 
+    def update_screener(self):
+        self.workers.submit("screener", self.run_screener, list(self.watchlist.symbols), on_result=self.show_screener)
+
+    def run_screener(self, symbols):
+        import market_data
+        from screener import screen, screener_universe
+        # One batched download for whatever isn't cached, then a single
+        # vectorized pass over the whole universe
+        series = market_data.get_many(screener_universe(symbols), "1y", "1d")
+        with tracing.span("screen", "compute", symbols=len(series)):
+            return screen(series)
+
+    def show_screener(self, result):
+        from analysis import OSCILLATOR_TEXT
+        table = self.screener_table
+        table.setSortingEnabled(False)
+        table.setRowCount(len(result))
+        for row, (symbol, values) in enumerate(result.iterrows()):
+            for column, (_, field, number_format) in enumerate(SCREENER_COLUMNS):
+                if field is None:
+                    item = SortableItem(symbol)
+                elif number_format is None:
+                    item = SortableItem(OSCILLATOR_TEXT.get(values[field]) or values[field].replace("_", " ").capitalize())
+                    if field == "trend":
+                        item.setData(Qt.UserRole, float(values["trend_score"]))
+                else:
+                    value = float(values[field])
+                    item = SortableItem(number_format.format(value))
+                    item.setData(Qt.UserRole, value)
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+        table.sortItems([field for _, field, _ in SCREENER_COLUMNS].index("rsi"), Qt.DescendingOrder)
+        table.resizeColumnsToContents()
+
+    def screener_double_clicked(self, row, column):
+        self.update_stock(self.screener_table.item(row, 0).text())
+        self.tab_widget.setCurrentIndex(0)
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = StockApp()
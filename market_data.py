@@ -0,0 +1,518 @@
+import ast
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from yfinance import shared as yf_shared
+
+import tracing
+from bar_store import ALL_HISTORY_DAYS, BarStore, to_epoch_ms
+from bars import BarSeries
+from cache import TTLCache
+from gateway import FetchGateway, TransientError, is_transient_message
+from indicators import IndicatorEngine
+
+# How long cached data stays fresh, in seconds
+INTRADAY_TTL = 60
+DAILY_TTL = 15 * 60
+FUNDAMENTALS_TTL = 6 * 60 * 60
+
+# Bar size used for each chart period; Yahoo only serves 5m bars for the
+# last 60 days and hourly bars for the last two years.
+CHART_INTERVALS = {
+    "1d": "5m",
+    "5d": "5m",
+    "1mo": "5m",
+    "6mo": "1h",
+    "1y": "1d",
+    "5y": "1d",
+    "max": "1d",
+}
+
+_tickers = TTLCache("tickers", max_size=64)
+_history = TTLCache("history", max_size=128)
+_info = TTLCache("info", max_size=256, ttl=FUNDAMENTALS_TTL)
+_price_targets = TTLCache("price_targets", max_size=256, ttl=FUNDAMENTALS_TTL)
+
+_store = None
+_gateway = None
+
+# yf.download keeps its per-call results in module-level dicts, so two
+# downloads running on different worker threads can clobber each other.
+_download_lock = threading.Lock()
+
+# Yahoo only serves intraday bars this far back
+INTRADAY_LOOKBACK_DAYS = 59
+
+
+def is_intraday(interval):
+    return (interval.endswith("m") and not interval.endswith("mo")) or interval.endswith("h")
+
+
+def history_ttl(interval):
+    return INTRADAY_TTL if is_intraday(interval) else DAILY_TTL
+
+
+def period_days(period):
+    if period == "max":
+        return ALL_HISTORY_DAYS
+    if period == "ytd":
+        return 366
+    if period.endswith("mo"):
+        return int(period[:-2]) * 31
+    if period.endswith("y"):
+        return int(period[:-1]) * 366
+    return int(period[:-1])
+
+
+def trim_to_period(frame, period):
+    if frame.empty or period == "max":
+        return frame
+    if period == "ytd":
+        return frame[frame.index.year == frame.index[-1].year]
+    if period.endswith("d"):
+        # "1d"/"5d" mean trading sessions, not calendar days
+        dates = frame.index.normalize()
+        first = dates.unique()[-int(period[:-1]):][0]
+        return frame[dates >= first]
+    if period.endswith("mo"):
+        offset = pd.DateOffset(months=int(period[:-2]))
+    else:
+        offset = pd.DateOffset(years=int(period[:-1]))
+    return frame[frame.index > frame.index[-1] - offset]
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = BarStore()
+    return _store
+
+
+def _describe(args, frame):
+    # Row count and in-memory size for a span; yfinance does not report the
+    # bytes it received, so the decoded frame size stands in for it
+    if frame is not None:
+        args["rows"] = len(frame)
+        args["frame_bytes"] = int(frame.memory_usage(index=True).sum())
+    return frame
+
+
+def _ticker_history(symbol, **kwargs):
+    key = ("history", symbol, tuple(sorted(kwargs.items())))
+    with tracing.span("Ticker.history", "fetch", symbol=symbol, **kwargs) as args:
+        return _describe(args, get_gateway().call(key, lambda: get_ticker(symbol).history(**kwargs)))
+
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        _gateway = FetchGateway()
+    return _gateway
+
+
+def get_ticker(symbol):
+    # Share one Ticker per symbol so its own lazy state is reused too
+    return _tickers.get_or_fetch(symbol, lambda: yf.Ticker(symbol, session=get_gateway().session))
+
+
+def _too_old(meta, interval):
+    # Stored intraday bars Yahoo can no longer join new ones onto
+    return (
+        meta is not None
+        and is_intraday(interval)
+        and time.time() * 1000 - meta["last_ts"] > INTRADAY_LOOKBACK_DAYS * 86_400_000
+    )
+
+
+def _covers(meta, period, interval):
+    # Whether the stored bars can be brought up to date from prev_ts
+    return meta is not None and meta["covered_days"] >= period_days(period) and not _too_old(meta, interval)
+
+
+def _is_fresh(meta, interval):
+    # Saved from Yahoo no longer ago than an in-memory copy would be kept
+    return meta["synced_at"] is not None and time.time() - meta["synced_at"] < history_ttl(interval)
+
+
+def _readjusted(new_bars, stored_tail):
+    # Past prices were re-adjusted (dividend or split), so the stored
+    # history is stale as a whole
+    overlap = new_bars.index.intersection(stored_tail.index)
+    return bool(len(overlap)) and abs(new_bars.loc[overlap[0], "Close"] - stored_tail.loc[overlap[0], "Close"]) > 1e-6
+
+
+def _load_history(symbol, period, interval):
+    # Serve history from the on-disk store, only asking Yahoo for bars newer
+    # than the last one stored. Falls back to stored bars when offline.
+    store = get_store()
+    meta = store.series_info(symbol, interval)
+    too_old = _too_old(meta, interval)
+
+    if not _covers(meta, period, interval):
+        try:
+            frame = _ticker_history(symbol, period=period, interval=interval)
+        except Exception:
+            if meta is None:
+                raise
+            frame = None
+        if frame is None or frame.empty:
+            if meta is None:
+                return BarSeries.empty_series()
+        else:
+            if too_old:
+                store.clear(symbol, interval)
+            store.save(symbol, interval, frame, period_days(period))
+    else:
+        # Re-request from the last finished bar so it can be compared with
+        # what we stored, and the possibly partial newest bar is replaced.
+        try:
+            start = pd.Timestamp(meta["prev_ts"], unit="ms", tz="UTC")
+            new_bars = _ticker_history(symbol, start=start, interval=interval)
+        except Exception:
+            new_bars = None
+        if new_bars is not None and not new_bars.empty:
+            stored_tail = store.load(symbol, interval, since_ms=meta["prev_ts"], tz=meta["tz"])
+            if _readjusted(new_bars, stored_tail):
+                store.clear(symbol, interval)
+                return _load_history(symbol, period, interval)
+            store.save(symbol, interval, new_bars)
+
+    return _read_store(store, store.series_info(symbol, interval), symbol, period, interval)
+
+
+def _read_store(store, meta, symbol, period, interval):
+    # Load a generous window and trim to the exact period in memory
+    window_days = min(period_days(period) * 2 + 7, ALL_HISTORY_DAYS)
+    since_ms = meta["last_ts"] - window_days * 86_400_000
+    frame = store.load(symbol, interval, since_ms=since_ms, tz=meta["tz"])
+    return BarSeries.from_frame(trim_to_period(frame, period))
+
+
+def get_stored_history(symbol, period, interval):
+    # History straight from the on-disk store, without asking Yahoo for
+    # newer bars; None if the store doesn't cover the period
+    store = get_store()
+    meta = store.series_info(symbol, interval)
+    if meta is None or meta["covered_days"] < period_days(period):
+        return None
+    return _read_store(store, meta, symbol, period, interval)
+
+
+def _cached(name, cache, key, fetch, ttl=None, cacheable=None, **span_args):
+    # cache.get_or_fetch() in a span that records whether it was a hit
+    with tracing.span(name, "fetch", **span_args) as args:
+        args["cache"] = "hit"
+
+        def load():
+            args["cache"] = "miss"
+            return fetch()
+
+        value = cache.get_or_fetch(key, load, ttl=ttl, cacheable=cacheable)
+        if isinstance(value, BarSeries):
+            args["rows"] = len(value)
+            args["nbytes"] = value.nbytes
+        return value
+
+
+def get_history(symbol, period, interval):
+    return _cached(
+        "get_history", _history, (symbol, period, interval),
+        lambda: _load_history(symbol, period, interval),
+        ttl=history_ttl(interval),
+        cacheable=lambda data: not data.empty,
+        symbol=symbol, period=period, interval=interval,
+    )
+
+
+def invalidate_history(symbol, interval):
+    _history.invalidate_where(lambda key: key[0] == symbol and key[2] == interval)
+
+
+def fetch_new_bars(symbol, interval, since_ms):
+    # Bars at or after since_ms straight from Yahoo, for live polling. They
+    # are merged into the store and stale in-memory series are dropped.
+    start = pd.Timestamp(since_ms, unit="ms", tz="UTC")
+    frame = _ticker_history(symbol, start=start, interval=interval)
+    if not frame.empty:
+        get_store().save(symbol, interval, frame)
+        invalidate_history(symbol, interval)
+    return BarSeries.from_frame(frame)
+
+
+class _DownloadErrors(logging.Handler):
+    # yf.download catches each symbol's exception and only logs it, as
+    # "['SYM', ...]: ErrorType('message')"; this collects them per symbol
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.errors = {}
+
+    def emit(self, record):
+        symbols, separator, error = record.getMessage().partition("]: ")
+        if not separator:
+            return
+        try:
+            symbols = ast.literal_eval(symbols.strip() + "]")
+        except (ValueError, SyntaxError):
+            return
+        for symbol in symbols:
+            self.errors[symbol] = error
+
+
+def _download_chunk(symbols, period, interval, start=None):
+    gateway = get_gateway()
+
+    def download():
+        errors = _DownloadErrors()
+        logger = logging.getLogger("yfinance")
+        with _download_lock:
+            logger.addHandler(errors)
+            try:
+                data = yf.download(
+                    list(symbols), period=period, start=start, interval=interval, group_by="ticker",
+                    auto_adjust=True, ignore_tz=False, threads=True, progress=False,
+                    session=gateway.session,
+                )
+            finally:
+                logger.removeHandler(errors)
+            # Older yfinance versions keep the errors in a module-level dict
+            errors.errors.update(getattr(yf_shared, "_ERRORS", None) or {})
+        # A throttled or dropped symbol comes back as an empty frame; raise
+        # so the gateway backs off and retries the chunk
+        failed = sorted(symbol for symbol, error in errors.errors.items() if is_transient_message(str(error)))
+        if failed:
+            raise TransientError(f"download failed for {', '.join(failed)}: {errors.errors[failed[0]]}")
+        return data
+
+    key = ("download", tuple(symbols), period, interval, start)
+    with tracing.span("yf.download", "fetch", symbols=len(symbols), period=period, interval=interval, start=start) as args:
+        # yfinance makes one request per symbol
+        return _describe(args, gateway.call(key, download, cost=len(symbols)))
+
+
+def download_many(symbols, period, interval, start=None):
+    # Grouped requests for many tickers, split back into per-symbol frames.
+    # yfinance makes one request per symbol, so a batch is sent in chunks
+    # the rate limit can pay for in full. With `start`, bars from then on
+    # are asked for instead of the period.
+    chunk_size = get_gateway().bucket.capacity
+    frames = {}
+    for offset in range(0, len(symbols), chunk_size):
+        chunk = list(symbols[offset:offset + chunk_size])
+        data = _download_chunk(chunk, period, interval, start)
+        for symbol in chunk:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    frames[symbol] = data.iloc[0:0]
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+            frames[symbol] = frame.dropna(how="all")
+    return frames
+
+
+def get_many(symbols, period, interval):
+    # Like get_history() for several symbols, but everything that isn't
+    # cached yet is served from the on-disk store where it is up to date,
+    # and the rest is fetched in batched downloads.
+    with tracing.span("get_many", "fetch", symbols=len(symbols), period=period, interval=interval) as args:
+        result = {}
+        missing = []
+        for symbol in symbols:
+            cached = _history.get((symbol, period, interval))
+            if cached is None:
+                missing.append(symbol)
+            else:
+                result[symbol] = cached
+        args["hits"] = len(symbols) - len(missing)
+        args["misses"] = len(missing)
+        if missing:
+            loaded, args["downloaded"] = _load_many(missing, period, interval)
+            for symbol, bars in loaded.items():
+                if not bars.empty:
+                    _history.set((symbol, period, interval), bars, ttl=history_ttl(interval))
+                result[symbol] = bars
+        return result
+
+
+def _load_many(symbols, period, interval):
+    # _load_history() for several symbols. Symbols the store covers are
+    # brought up to date in one batched download per prev_ts, unless they
+    # were saved within the TTL; the rest are downloaded in full. Offline,
+    # whatever is stored is served. Also returns how many symbols were
+    # asked of Yahoo.
+    store = get_store()
+    metas = {symbol: store.series_info(symbol, interval) for symbol in symbols}
+    full = [symbol for symbol in symbols if not _covers(metas[symbol], period, interval)]
+    since = {}
+    for symbol in symbols:
+        meta = metas[symbol]
+        if symbol not in full and not _is_fresh(meta, interval):
+            since.setdefault(meta["prev_ts"], []).append(symbol)
+
+    for prev_ts, group in since.items():
+        try:
+            frames = download_many(group, None, interval, start=pd.Timestamp(prev_ts, unit="ms", tz="UTC"))
+        except Exception:
+            continue
+        for symbol, frame in frames.items():
+            if frame.empty:
+                continue
+            stored_tail = store.load(symbol, interval, since_ms=prev_ts, tz=metas[symbol]["tz"])
+            if _readjusted(frame, stored_tail):
+                store.clear(symbol, interval)
+                metas[symbol] = None
+                full.append(symbol)
+            else:
+                store.save(symbol, interval, frame)
+
+    downloaded = len(full) + sum(len(group) for group in since.values())
+    result = {}
+    if full:
+        try:
+            frames = download_many(full, period, interval)
+        except Exception:
+            # Offline: serve what is stored, unless that is nothing at all
+            if not any(metas.values()):
+                raise
+            frames = {}
+        for symbol, frame in frames.items():
+            if frame.empty:
+                continue
+            if _too_old(metas[symbol], interval):
+                store.clear(symbol, interval)
+            _save_batch(store, symbol, interval, frame, period)
+            # Converted to compact arrays once, here at ingest
+            result[symbol] = BarSeries.from_frame(trim_to_period(frame, period))
+
+    for symbol in symbols:
+        if symbol not in result:
+            meta = store.series_info(symbol, interval)
+            result[symbol] = _read_store(store, meta, symbol, period, interval) if meta else BarSeries.empty_series()
+    return result, downloaded
+
+
+def _save_batch(store, symbol, interval, frame, period):
+    # Only store a batch that joins onto the stored bars. Incremental
+    # refreshes start from the newest stored bar, so a batch that begins
+    # after it would leave a hole in the store that is never filled; in that
+    # case the store is left for get_history() to bring up to date.
+    meta = store.series_info(symbol, interval)
+    if meta is not None and to_epoch_ms(frame.index[:1])[0] > meta["last_ts"]:
+        return
+    store.save(symbol, interval, frame, period_days(period))
+
+
+def prefetch(symbols, period, interval):
+    start = time.perf_counter()
+    get_many(symbols, period, interval)
+    return time.perf_counter() - start
+
+
+def session_start(ts_ms, tz=None):
+    # Epoch ms of the midnight (exchange time) that starts ts_ms's session,
+    # which is how daily bars are stamped
+    stamp = pd.Timestamp(ts_ms, unit="ms", tz="UTC")
+    if tz:
+        stamp = stamp.tz_convert(tz)
+    return stamp.normalize().value // 1_000_000
+
+
+def get_indicators(symbol, period="1y", interval="1d", live=None):
+    # Indicator values for the latest bar. The engine state is persisted
+    # with the stored history and only bars it hasn't seen are pushed; the
+    # newest bar may still be forming, so it is applied provisionally.
+    # `live` is an optional streamed quote (ts_ms, day_high, day_low, price)
+    # that updates the forming daily bar without another download.
+    history = get_history(symbol, period, interval)
+    if history.empty:
+        raise IndexError(f"No price data for {symbol}")
+    timestamps = history.ts
+
+    store = get_store()
+    engine = None
+    start = 0
+    state = store.load_state(symbol, interval)
+    if state is not None:
+        engine = IndicatorEngine.from_state(state)
+        position = int(np.searchsorted(timestamps, engine.last_ts))
+        # Rebuild if the stored bar is gone or its price was re-adjusted
+        if (
+            position >= len(timestamps)
+            or timestamps[position] != engine.last_ts
+            or float(history.close[position]) != engine.last_close
+        ):
+            engine = None
+        else:
+            start = position + 1
+    if engine is None:
+        engine = IndicatorEngine()
+        start = 0
+
+    last = len(timestamps) - 1
+    # Bars before `committed` are final
+    committed = last
+    provisional = (int(timestamps[last]), float(history.high[last]), float(history.low[last]), float(history.close[last]))
+    if live is not None:
+        ts, high, low, price = live
+        day = session_start(ts, history.tz)
+        if day > provisional[0]:
+            # A session the history doesn't have yet, so the last stored bar is final
+            committed = last + 1
+            provisional = (day, high, low, price)
+        elif day == provisional[0]:
+            provisional = (day, max(provisional[1], high), min(provisional[2], low), price)
+
+    with tracing.span("indicators", "compute", symbol=symbol, rows=len(timestamps), pushed=max(committed - start, 0)):
+        if start < committed:
+            # Only the unseen bars (a view) are widened to float64 and pushed
+            pending = history[start:committed]
+            highs = pending.high.astype(np.float64).tolist()
+            lows = pending.low.astype(np.float64).tolist()
+            closes = pending.close.astype(np.float64).tolist()
+            for i, stamp in enumerate(pending.ts.tolist()):
+                engine.push(stamp, highs[i], lows[i], closes[i])
+            store.save_state(symbol, interval, engine.state())
+        if engine.last_ts is not None and provisional[0] <= engine.last_ts:
+            # The newest bar was already committed
+            return engine.snapshot()
+        return engine.snapshot(provisional)
+
+
+def get_info(symbol):
+    return _cached(
+        "Ticker.info", _info, symbol,
+        lambda: get_gateway().call(("info", symbol), lambda: get_ticker(symbol).info), symbol=symbol,
+    )
+
+
+def get_price_targets(symbol):
+    return _cached(
+        "Ticker.get_analyst_price_targets", _price_targets, symbol,
+        lambda: get_gateway().call(("price_targets", symbol), lambda: get_ticker(symbol).get_analyst_price_targets()),
+        symbol=symbol,
+    )
+
+
+def chart_interval(period):
+    return CHART_INTERVALS.get(period, "1d")
+
+
+def fetch_chart_data(symbol, period):
+    return get_history(symbol, period, chart_interval(period))
+
+
+def cache_stats():
+    return {cache.name: cache.stats() for cache in (_tickers, _history, _info, _price_targets)}
+
+
+def clear_caches():
+    # Forget everything held in memory; the store is reopened on next use
+    global _store
+    for cache in (_tickers, _history, _info, _price_targets):
+        cache.clear()
+    _store = None
@@ -0,0 +1,17 @@
+import os
+
+# Kept free of heavy imports so modules loaded before the window paints can
+# find the data folder too
+
+
+def data_dir():
+    return os.environ.get("STOCKSNAPSHOT_DATA_DIR", os.path.join(os.path.expanduser("~"), ".stocksnapshot"))
+
+
+def write_atomic(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write then rename so a crash never leaves a half-written file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+import analysis
+from indicators import MA_WINDOWS, RSI_WINDOW, STOCH_SMOOTHING, STOCH_WINDOW
+
+# Computes the analysis panel's indicators for a whole universe at once.
+# Each symbol's most recent bars are right-aligned into 2-D (bars x symbols)
+# arrays, so every indicator is a handful of NumPy reductions over all
+# symbols rather than a pandas pipeline per ticker. Aligning by position
+# rather than date gives exactly the values update_analysis computes from
+# each symbol's own history.
+
+DEPTH = max(max(MA_WINDOWS), STOCH_WINDOW + STOCH_SMOOTHING - 1, RSI_WINDOW + 1)
+
+TREND_SCORE = {"strong_uptrend": 2, "bullish": 1, "mixed": 0, "bearish": -1, "strong_downtrend": -2}
+
+
+def build_panel(series, depth=DEPTH):
+    # series maps symbol -> BarSeries; only the last `depth` bars are read
+    symbols = [symbol for symbol, bars in series.items() if not bars.empty]
+    panels = {}
+    for column in ("High", "Low", "Close"):
+        panel = np.full((depth, len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            values = getattr(series[symbol], column.lower())[-depth:]
+            panel[depth - len(values):, j] = values
+        panels[column] = panel
+    return symbols, panels
+
+
+def screen(series):
+    symbols, panels = build_panel(series)
+    highs, lows, closes = panels["High"], panels["Low"], panels["Close"]
+    result = pd.DataFrame(index=pd.Index(symbols, name="symbol"))
+    result["close"] = closes[-1]
+
+    # Moving averages; like rolling().mean(), a NaN in the window gives NaN
+    for window in MA_WINDOWS:
+        result[f"ma{window}"] = closes[-window:].mean(axis=0)
+
+    # Stochastic %K for the last STOCH_SMOOTHING bars, then %D as their mean
+    span = STOCH_WINDOW + STOCH_SMOOTHING - 1
+    low_14 = np.lib.stride_tricks.sliding_window_view(lows[-span:], STOCH_WINDOW, axis=0).min(axis=-1)
+    high_14 = np.lib.stride_tricks.sliding_window_view(highs[-span:], STOCH_WINDOW, axis=0).max(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = 100 * ((closes[-STOCH_SMOOTHING:] - low_14) / (high_14 - low_14))
+    result["k"] = k[-1]
+    # A %K over a flat range can be +/-inf; like rolling().mean() that gives NaN
+    result["d"] = np.where(np.isinf(k), np.nan, k).mean(axis=0)
+
+    # RSI; a missing change counts as zero, as in delta.where(delta > 0, 0)
+    delta = np.diff(closes[-(RSI_WINDOW + 1):], axis=0)
+    gain = np.where(delta > 0, delta, 0).mean(axis=0)
+    loss = np.where(delta < 0, -delta, 0).mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + gain / loss))
+    # Like rolling(RSI_WINDOW).mean(), too short a history gives NaN rather
+    # than an RSI over the padding's zero changes
+    lengths = np.array([len(series[symbol]) for symbol in symbols])
+    result["rsi"] = np.where(lengths < RSI_WINDOW, np.nan, rsi)
+
+    ma10, ma30, ma50 = result["ma10"].to_numpy(), result["ma30"].to_numpy(), result["ma50"].to_numpy()
+    result["trend"] = np.select(
+        [(ma10 > ma30) & (ma30 > ma50), (ma10 < ma30) & (ma30 < ma50)],
+        ["strong_uptrend", "strong_downtrend"],
+        "mixed",
+    )
+    result["trend_score"] = result["trend"].map(TREND_SCORE)
+    last_k, last_d = result["k"], result["d"]
+    result["stochastic_signal"] = _oscillator_signal(
+        (last_k > analysis.STOCH_OVERBOUGHT) & (last_d > analysis.STOCH_OVERBOUGHT),
+        (last_k < analysis.STOCH_OVERSOLD) & (last_d < analysis.STOCH_OVERSOLD),
+    )
+    result["rsi_signal"] = _oscillator_signal(result["rsi"] > analysis.RSI_OVERBOUGHT, result["rsi"] < analysis.RSI_OVERSOLD)
+    return result
+
+
+def _oscillator_signal(overbought, oversold):
+    return np.select([overbought, oversold], ["overbought", "oversold"], "neutral")
+
+
+def screener_universe(extra=()):
+    return list(dict.fromkeys(list(extra) + analysis.sector_universe()))
@@ -0,0 +1,276 @@
+import asyncio
+import base64
+import json
+import os
+import random
+import threading
+
+import numpy as np
+import websockets
+from google.protobuf.message import DecodeError
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from yfinance.pricing_pb2 import PricingData
+
+import tracing
+from bars import BarSeries
+
+# Live ticks from Yahoo's quote streamer (or a local stand-in, see
+# benchmarks/tick_server.py), folded into 5 minute bars as they arrive.
+# The socket is read by an asyncio loop on its own thread; the GUI thread
+# collects whatever changed at most every FLUSH_MS, so a burst of ticks
+# costs one redraw instead of one per tick.
+
+STREAM_URL = os.environ.get("STOCKSNAPSHOT_STREAM_URL", "wss://streamer.finance.yahoo.com/?version=2")
+# Set STOCKSNAPSHOT_STREAM=0 to keep live mode on polling alone
+STREAM_ENABLED = os.environ.get("STOCKSNAPSHOT_STREAM", "1") != "0"
+
+# Bars built from ticks, matching the intraday charts
+INTERVAL = "5m"
+BAR_MS = 5 * 60 * 1000
+# Bars kept per symbol; the charts hold the full history
+MAX_BARS = 288
+# Shortest time between two hand-overs to the GUI
+FLUSH_MS = 250
+# Yahoo drops subscriptions that aren't renewed
+RESUBSCRIBE_SECONDS = 15
+MAX_RECONNECT_DELAY = 60
+
+
+def decode_tick(message):
+    # (symbol, ts_ms, price, day_volume, day_high, day_low), or None for
+    # anything that isn't a price update
+    try:
+        data = PricingData.FromString(base64.b64decode(json.loads(message)["message"]))
+    except (ValueError, KeyError, TypeError, DecodeError):
+        return None
+    if not data.id or not data.price:
+        return None
+    ts = data.time
+    if ts < 10**11:
+        # Older streamer versions send seconds
+        ts *= 1000
+    return data.id, ts, data.price, data.day_volume, data.day_high, data.day_low
+
+
+def encode_tick(symbol, ts_ms, price, day_volume=0, day_high=0.0, day_low=0.0):
+    data = PricingData(id=symbol, time=ts_ms, price=price, day_volume=day_volume, day_high=day_high, day_low=day_low)
+    return json.dumps({"type": "pricing", "message": base64.b64encode(data.SerializeToString()).decode()})
+
+
+class BarBuilder:
+    # Folds ticks into fixed-size OHLCV bars. Nothing is queued per tick:
+    # each one updates the bar it falls in, and take() returns just the bars
+    # that changed since the previous call. Safe to use from two threads.
+    def __init__(self, bar_ms=BAR_MS, max_bars=MAX_BARS):
+        self.bar_ms = bar_ms
+        self.max_bars = max_bars
+        self.bars = {}
+        self.day_volume = {}
+        self.quotes = {}
+        self.changed = {}
+        self.ticks = 0
+        self.late = 0
+        self._lock = threading.Lock()
+
+    def seed(self, symbol, ts_ms, close, volume):
+        # Continue the bar already on screen, so a stream that starts halfway
+        # through a bar keeps its volume. Only close and volume are known.
+        with self._lock:
+            self.bars[symbol] = [[ts_ms, close, close, close, close, volume]]
+
+    def add(self, symbol, ts_ms, price, day_volume=0, day_high=0.0, day_low=0.0):
+        start = ts_ms - ts_ms % self.bar_ms
+        with self._lock:
+            self.ticks += 1
+            # Volume arrives as a running total for the day
+            previous = self.day_volume.get(symbol)
+            self.day_volume[symbol] = day_volume
+            volume = day_volume - previous if previous is not None and day_volume >= previous else 0
+            rows = self.bars.setdefault(symbol, [])
+            if rows and start < rows[-1][0]:
+                # Ticks for a closed bar; the next poll corrects it
+                self.late += 1
+                return
+            if rows and rows[-1][0] == start:
+                bar = rows[-1]
+                bar[2] = max(bar[2], price)
+                bar[3] = min(bar[3], price)
+                bar[4] = price
+                bar[5] += volume
+            else:
+                rows.append([start, price, price, price, price, volume])
+                if len(rows) > self.max_bars:
+                    del rows[0]
+            self.changed[symbol] = min(self.changed.get(symbol, start), start)
+            # Indices have no day range; fall back to the price
+            self.quotes[symbol] = (ts_ms, day_high or price, day_low or price, price)
+
+    def take(self):
+        # {symbol: (BarSeries of the changed bars, latest quote)}
+        with self._lock:
+            changed, self.changed = self.changed, {}
+            updates = {}
+            for symbol, start in changed.items():
+                rows = np.array([row for row in self.bars[symbol] if row[0] >= start], dtype=np.float64)
+                bars = BarSeries(
+                    rows[:, 0].astype(np.int64),
+                    *(rows[:, column].astype(np.float32) for column in range(1, 5)),
+                    rows[:, 5].astype(np.int64),
+                )
+                updates[symbol] = (bars, self.quotes[symbol])
+            return updates
+
+
+class TickStream(QObject):
+    # Streams ticks for a set of symbols and calls on_update(symbol, bars,
+    # quote) on the GUI thread with the bars changed since the last call and
+    # the latest (ts_ms, day_high, day_low, price) quote. Qt has no asyncio
+    # integration built in, so the asyncio loop runs on a thread of its own
+    # and wakes the GUI with a queued signal, at most one pending at a time.
+    updated = pyqtSignal()
+    status_changed = pyqtSignal(str)
+
+    def __init__(self, on_update, url=STREAM_URL, flush_ms=FLUSH_MS, parent=None):
+        super().__init__(parent)
+        self.on_update = on_update
+        self.url = url
+        self.builder = BarBuilder()
+        # Symbols streamed, as seen from the GUI thread and the stream thread
+        self.watched = set()
+        self.symbols = set()
+        self.loop = None
+        self.thread = None
+        self.ws = None
+        self.stopping = None
+        self.stats = {"flushes": 0, "reconnects": 0}
+        self._wake_pending = threading.Event()
+        self.updated.connect(self._schedule_flush)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(flush_ms)
+        self.flush_timer.timeout.connect(self._flush)
+
+    def is_active(self):
+        return self.thread is not None
+
+    def watch(self, seeds):
+        # Stream these symbols from now on. seeds maps each symbol to the
+        # (ts_ms, close, volume) of the last bar on screen.
+        if self.thread is None:
+            self.builder = BarBuilder()
+        for symbol, seed in seeds.items():
+            if symbol not in self.watched:
+                self.builder.seed(symbol, *seed)
+        self.watched = set(seeds)
+        if self.thread is None:
+            self.symbols = set(seeds)
+            self.loop = asyncio.new_event_loop()
+            self.stopping = asyncio.Event()
+            self.thread = threading.Thread(target=self._run, name="tick-stream", daemon=True)
+            self.thread.start()
+        else:
+            self.loop.call_soon_threadsafe(self._resubscribe, set(seeds))
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.stopping.set)
+        self.thread.join(timeout=5)
+        self.thread = None
+        self.loop = None
+        self.watched = set()
+        self.flush_timer.stop()
+        self._wake_pending.clear()
+        self.status_changed.emit("Streaming stopped")
+
+    # Everything below up to _flush runs on the stream thread
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._stream())
+        finally:
+            self.loop.close()
+
+    async def _stream(self):
+        reader = asyncio.create_task(self._read_forever())
+        stopping = asyncio.create_task(self.stopping.wait())
+        await asyncio.wait([reader, stopping], return_when=asyncio.FIRST_COMPLETED)
+        reader.cancel()
+        stopping.cancel()
+        await asyncio.gather(reader, stopping, return_exceptions=True)
+
+    async def _read_forever(self):
+        delay = 1
+        while True:
+            try:
+                async with websockets.connect(self.url, open_timeout=10) as ws:
+                    self.ws = ws
+                    delay = 1
+                    self.status_changed.emit(f"Streaming ticks for {', '.join(sorted(self.symbols))}")
+                    if self.symbols:
+                        await self._send({"subscribe": sorted(self.symbols)})
+                    renew = asyncio.create_task(self._renew())
+                    try:
+                        async for message in ws:
+                            tick = decode_tick(message)
+                            if tick is not None:
+                                self.builder.add(*tick)
+                                self._wake()
+                    finally:
+                        renew.cancel()
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                self.status_changed.emit(f"Stream disconnected ({e}), reconnecting")
+            self.ws = None
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(RESUBSCRIBE_SECONDS)
+            if self.symbols:
+                await self._send({"subscribe": sorted(self.symbols)})
+
+    async def _send(self, message):
+        if self.ws is None:
+            return
+        try:
+            await self.ws.send(json.dumps(message))
+        except websockets.ConnectionClosed:
+            # The reader notices too and reconnects, subscribing afresh
+            pass
+
+    def _resubscribe(self, symbols):
+        removed = sorted(self.symbols - symbols)
+        added = sorted(symbols - self.symbols)
+        self.symbols = symbols
+        if removed:
+            asyncio.ensure_future(self._send({"unsubscribe": removed}))
+        if added:
+            asyncio.ensure_future(self._send({"subscribe": added}))
+
+    def _wake(self):
+        # At most one wake-up waits in the GUI's event queue; later ticks
+        # are picked up by the flush it triggers
+        if not self._wake_pending.is_set():
+            self._wake_pending.set()
+            self.updated.emit()
+
+    # GUI thread
+
+    def _schedule_flush(self):
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def _flush(self):
+        if self.thread is None:
+            return
+        self._wake_pending.clear()
+        updates = self.builder.take()
+        if not updates:
+            return
+        self.stats["flushes"] += 1
+        with tracing.span("stream.flush", "render", symbols=len(updates), ticks=self.builder.ticks):
+            for symbol, (bars, quote) in updates.items():
+                self.on_update(symbol, bars, quote)
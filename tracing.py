@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from paths import data_dir
+
+# Span timings for the fetch, compute and render stages. Spans are kept in a
+# ring buffer, summarized in the status bar and can be exported as a Chrome
+# trace (chrome://tracing or https://ui.perfetto.dev). Nothing here may import
+# PyQt5, pandas or yfinance.
+
+SPAN_LIMIT = 5000
+
+# "cprofile" or "pyinstrument": profile the jobs of one refresh
+PROFILE = os.environ.get("STOCKSNAPSHOT_PROFILE", "").lower()
+
+_spans = deque(maxlen=SPAN_LIMIT)
+_lock = threading.Lock()
+_profile_pending = bool(PROFILE)
+_origin = time.perf_counter()
+
+
+@contextmanager
+def span(name, category, **args):
+    # Yields the span's args so the body can add rows, bytes, cache hit/miss
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        end = time.perf_counter()
+        record = (name, category, start, end - start, threading.get_ident(), args)
+        with _lock:
+            _spans.append(record)
+
+
+def spans():
+    with _lock:
+        return list(_spans)
+
+
+def clear():
+    with _lock:
+        _spans.clear()
+
+
+def latest(names):
+    # Duration in seconds of the most recent span for each name
+    found = {}
+    for name, _, _, duration, _, _ in reversed(spans()):
+        if name in names and name not in found:
+            found[name] = duration
+            if len(found) == len(names):
+                break
+    return found
+
+
+def chrome_trace():
+    events = []
+    for name, category, start, duration, thread, args in spans():
+        events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - _origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": thread,
+            "args": {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                     for key, value in args.items()},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path=None):
+    if path is None:
+        path = os.path.join(data_dir(), time.strftime("trace-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(chrome_trace(), f)
+    return path
+
+
+def take_profile_request():
+    # Profiling is requested once per run; the first caller gets the mode
+    global _profile_pending
+    with _lock:
+        pending, _profile_pending = _profile_pending, False
+    return PROFILE if pending else None
+
+
+def profiled(name, mode, fn, *args, **kwargs):
+    # Runs fn under cProfile or pyinstrument and writes the profile next to
+    # the stored data. Both only see the calling thread.
+    directory = os.path.join(data_dir(), "profiles")
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, time.strftime(f"{name}-%Y%m%d-%H%M%S"))
+
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("Error: pyinstrument is not installed, using cProfile")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.stop()
+                with open(stem + ".html", "w") as f:
+                    f.write(profiler.output_html())
+                print(f"Profile written to {stem}.html")
+
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(stem + ".prof")
+        print(f"Profile written to {stem}.prof")
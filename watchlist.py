@@ -0,0 +1,148 @@
+import json
+import os
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QPointF, Qt
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QStyle, QStyledItemDelegate
+
+from paths import data_dir, write_atomic
+
+# The user's watchlist: saved to disk on every edit and shown through a
+# model/view table, so only the rows on screen are painted and a refresh
+# repaints only the rows whose quote changed. Nothing here may import
+# pandas or yfinance; the table is built before the window first paints.
+
+COLUMNS = ["Symbol", "Last", "Change", "Today"]
+SPARKLINE_COLUMN = 3
+# Role under which the sparkline's closes are returned
+SPARKLINE_ROLE = Qt.UserRole
+
+UP_COLOR = QColor(0, 150, 0)
+DOWN_COLOR = QColor(200, 0, 0)
+
+
+def default_path():
+    return os.path.join(data_dir(), "watchlist.json")
+
+
+def load_watchlist(default, path=None):
+    try:
+        with open(path or default_path()) as f:
+            symbols = json.load(f)["symbols"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return list(default)
+    return [str(symbol) for symbol in symbols]
+
+
+def save_watchlist(symbols, path=None):
+    write_atomic(path or default_path(), json.dumps({"symbols": list(symbols)}, indent=1))
+
+
+class WatchlistModel(QAbstractTableModel):
+    # Rows are symbols; quotes are (last, change %, sparkline closes) tuples
+    # from chart_data.session_quote(). Edits are saved straight away.
+    def __init__(self, symbols, path=None, parent=None):
+        super().__init__(parent)
+        self.symbols = list(dict.fromkeys(symbols))
+        self.path = path
+        self.quotes = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.symbols)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        symbol = self.symbols[index.row()]
+        column = index.column()
+        quote = self.quotes.get(symbol)
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return symbol
+            if quote is None or column == SPARKLINE_COLUMN:
+                return "N/A" if quote is None and column else None
+            last, change, _ = quote
+            if column == 1:
+                return f"{last:.2f}"
+            return "N/A" if change is None else f"{change:+.2f}%"
+        if quote is None:
+            return None
+        if role == SPARKLINE_ROLE and column == SPARKLINE_COLUMN:
+            return quote[2]
+        if role == Qt.ForegroundRole and column == 2 and quote[1] is not None:
+            return UP_COLOR if quote[1] >= 0 else DOWN_COLOR
+        if role == Qt.TextAlignmentRole and column in (1, 2):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def symbol(self, row):
+        return self.symbols[row]
+
+    def add_symbol(self, symbol):
+        if symbol in self.symbols:
+            return False
+        row = len(self.symbols)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.symbols.append(symbol)
+        self.endInsertRows()
+        save_watchlist(self.symbols, self.path)
+        return True
+
+    def remove_rows(self, rows):
+        # Highest rows first so the lower row numbers stay valid
+        for row in sorted(set(rows), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.quotes.pop(self.symbols.pop(row), None)
+            self.endRemoveRows()
+        save_watchlist(self.symbols, self.path)
+
+    def update_quotes(self, quotes):
+        # Store new quotes and signal only the rows that changed, one
+        # dataChanged per run of consecutive rows. Returns the rows changed.
+        changed = []
+        for row, symbol in enumerate(self.symbols):
+            quote = quotes.get(symbol)
+            if quote is not None and quote != self.quotes.get(symbol):
+                self.quotes[symbol] = quote
+                changed.append(row)
+        last_column = len(COLUMNS) - 1
+        first = None
+        for i, row in enumerate(changed):
+            if first is None:
+                first = row
+            if i + 1 == len(changed) or changed[i + 1] != row + 1:
+                self.dataChanged.emit(self.index(first, 0), self.index(row, last_column))
+                first = None
+        return changed
+
+
+class SparklineDelegate(QStyledItemDelegate):
+    # Draws the closes from SPARKLINE_ROLE as a line scaled to the cell,
+    # green when the session is up and red when it is down
+    def paint(self, painter, option, index):
+        closes = index.data(SPARKLINE_ROLE)
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        if not closes or len(closes) < 2:
+            return
+        rect = option.rect.adjusted(4, 4, -4, -4)
+        low, high = min(closes), max(closes)
+        span = (high - low) or 1.0
+        step = rect.width() / (len(closes) - 1)
+        polygon = QPolygonF([
+            QPointF(rect.left() + i * step, rect.bottom() - (value - low) / span * rect.height())
+            for i, value in enumerate(closes)
+        ])
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(UP_COLOR if closes[-1] >= closes[0] else DOWN_COLOR, 1.5))
+        painter.drawPolyline(polygon)
+        painter.restore()
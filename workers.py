@@ -0,0 +1,114 @@
+import itertools
+import time
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+import tracing
+
+
+class WorkerSignals(QObject):
+    # Signals carry the job id so results can be routed back on the GUI thread
+    finished = pyqtSignal(int, object)
+    error = pyqtSignal(int, object)
+
+
+class FetchWorker(QRunnable):
+    def __init__(self, job_id, channel, signals, fn, args, kwargs, profile=None):
+        super().__init__()
+        self.job_id = job_id
+        self.channel = channel
+        self.signals = signals
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.profile = profile
+        self.queued = time.perf_counter()
+
+    @pyqtSlot()
+    def run(self):
+        # Skip jobs that went stale while they were still queued
+        if self.cancelled:
+            return
+        wait_ms = (time.perf_counter() - self.queued) * 1000
+        try:
+            with tracing.span(f"job:{self.channel}", "worker", wait_ms=round(wait_ms, 2)):
+                if self.profile:
+                    result = tracing.profiled(self.channel, self.profile, self.fn, *self.args, **self.kwargs)
+                else:
+                    result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.error.emit(self.job_id, e)
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(self.job_id, result)
+
+
+class WorkerPool(QObject):
+    # Runs blocking fetches on a thread pool. Jobs are grouped into channels
+    # (e.g. "chart", "analysis"); submitting a new job on a channel makes any
+    # older job on that channel stale, so its result is dropped.
+    def __init__(self, parent=None, max_threads=8):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.signals = WorkerSignals()
+        self.signals.finished.connect(self._on_finished)
+        self.signals.error.connect(self._on_error)
+        self.job_ids = itertools.count(1)
+        self.jobs = {}
+        self.profile_channels = {}
+
+    def profile_next(self, channels, mode):
+        # Run the next job on each of these channels under the profiler
+        for channel in channels:
+            self.profile_channels[channel] = mode
+
+    def submit(self, channel, fn, *args, on_result=None, on_error=None, **kwargs):
+        self.cancel(channel)
+        job_id = next(self.job_ids)
+        profile = self.profile_channels.pop(channel, None)
+        worker = FetchWorker(job_id, channel, self.signals, fn, args, kwargs, profile)
+        self.jobs[job_id] = (channel, worker, on_result, on_error)
+        self.pool.start(worker)
+        return job_id
+
+    def cancel(self, channel):
+        for job_id, (job_channel, worker, _, _) in list(self.jobs.items()):
+            if job_channel == channel:
+                worker.cancelled = True
+                del self.jobs[job_id]
+
+    def shutdown(self):
+        for _, worker, _, _ in self.jobs.values():
+            worker.cancelled = True
+        self.jobs.clear()
+        self.pool.clear()
+
+    @pyqtSlot(int, object)
+    def _on_finished(self, job_id, result):
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return  # Stale or cancelled
+        _, _, on_result, on_error = job
+        if on_result is None:
+            return
+        try:
+            on_result(result)
+        except Exception as e:
+            # An exception escaping a slot would abort the whole app
+            if on_error is None:
+                raise
+            on_error(e)
+
+    @pyqtSlot(int, object)
+    def _on_error(self, job_id, error):
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return
+        _, _, _, on_error = job
+        if on_error is not None:
+            on_error(error)
+        else:
+            print(f"Error: {error}")